@@ -0,0 +1,387 @@
+"""
+A statistical benchmark harness for comparing function variants.
+
+Variants are registered into named groups along with an input factory. Every variant in a group is run over a number of
+warmup calls and timed repetitions for each input size in a sweep. The timings are summarised as min, median, p95 and
+p99 along with a fitted scaling curve, and the results can be written out as JSON and compared with an earlier run to
+flag regressions. Runs can also measure the peak and retained memory of one call per size with tracemalloc, fitted
+to a scaling curve the same way, to check the space complexity of each variant.
+
+Author: Fuzzy Carter
+"""
+
+import argparse
+import inspect
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+from function_timer import measure_call_memory
+
+DEFAULT_SIZES = (16, 64, 256, 1024, 4096)
+DEFAULT_WARMUP = 3
+DEFAULT_REPETITIONS = 30
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+# Each sample loops the function until at least this much time has passed so very fast calls are not lost in the
+# resolution of the clock.
+MIN_SAMPLE_NS = 50_000
+
+# Candidate growth functions used when fitting a scaling curve to the medians.
+SCALING_MODELS = {
+    "O(1)": lambda n: 1.0,
+    "O(log n)": lambda n: math.log2(n),
+    "O(n)": lambda n: float(n),
+    "O(n log n)": lambda n: n * math.log2(n),
+    "O(n^2)": lambda n: float(n) ** 2,
+}
+
+_GROUPS: Dict[str, dict] = {}
+
+
+def register_group(group: str, input_factory: Callable[[int], tuple], sizes: tuple = DEFAULT_SIZES,
+                   fresh_inputs: bool = False) -> None:
+    """
+    Register a group of comparable variants.
+
+    :param group: The name of the group.
+    :param input_factory: Builds the positional arguments for one call from an input size.
+    :param sizes: The default input sizes to sweep over.
+    :param fresh_inputs: Build new inputs for every call, for variants that modify their input in place.
+    """
+    _GROUPS[group] = {
+        "input_factory": input_factory,
+        "sizes": tuple(sizes),
+        "fresh_inputs": fresh_inputs,
+        "variants": {},
+    }
+
+
+def register_variant(group: str, func: Callable, name: Optional[str] = None) -> Callable:
+    """
+    Register a variant into a group. Decorators such as function_timer are unwrapped so only the function itself is
+    timed.
+
+    :param group: The name of a registered group.
+    :param func: The variant to time.
+    :param name: The name to report the variant under, defaults to the function name.
+    :return: The function that was passed in.
+    """
+    if group not in _GROUPS:
+        raise KeyError(f"Benchmark group {group!r} has not been registered.")
+
+    _GROUPS[group]["variants"][name or func.__name__] = inspect.unwrap(func)
+
+    return func
+
+
+def registered_groups() -> List[str]:
+    """
+    Get the names of all registered groups.
+    """
+    return list(_GROUPS)
+
+
+def run_benchmarks(groups: Optional[List[str]] = None, sizes: Optional[tuple] = None, warmup: int = DEFAULT_WARMUP,
+                   repetitions: int = DEFAULT_REPETITIONS, memory: bool = False) -> dict:
+    """
+    Run the registered variants and summarise their timings.
+
+    :param groups: The groups to run, defaults to all registered groups.
+    :param sizes: The input sizes to sweep over, defaults to the sizes each group was registered with.
+    :param warmup: The number of untimed calls made before sampling.
+    :param repetitions: The number of timed samples taken per variant and size.
+    :param memory: Also measure the memory used by one call per variant and size.
+    :return: A JSON serialisable dictionary of results.
+    """
+    results = {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "warmup": warmup,
+            "repetitions": repetitions,
+            "memory": memory,
+        },
+        "groups": {},
+    }
+
+    for group in groups or registered_groups():
+        config = _GROUPS[group]
+        group_sizes = tuple(sizes or config["sizes"])
+        group_results = {}
+
+        for name, func in config["variants"].items():
+            size_results = {}
+
+            for size in group_sizes:
+                samples = sample_variant(func, config["input_factory"], size, warmup, repetitions,
+                                         config["fresh_inputs"])
+                size_results[str(size)] = summarise_samples(samples)
+
+                if memory:
+                    _, size_results[str(size)]["memory"] = measure_call_memory(func, *config["input_factory"](size))
+
+            medians = [size_results[str(size)]["median"] for size in group_sizes]
+            group_results[name] = {
+                "sizes": size_results,
+                "scaling": fit_scaling(group_sizes, medians),
+            }
+
+            if memory:
+                # A variant that allocates nothing fits O(1) exactly rather than dividing by zero.
+                peaks = [max(size_results[str(size)]["memory"]["peak_bytes"], 1) for size in group_sizes]
+                group_results[name]["memory_scaling"] = fit_scaling(group_sizes, peaks)
+
+        results["groups"][group] = group_results
+
+    return results
+
+
+def sample_variant(func: Callable, input_factory: Callable[[int], tuple], size: int, warmup: int, repetitions: int,
+                   fresh_inputs: bool) -> List[float]:
+    """
+    Time one variant at one input size.
+
+    :return: The time of a single call in seconds for each repetition.
+    """
+    args = input_factory(size)
+    for _ in range(warmup):
+        func(*(input_factory(size) if fresh_inputs else args))
+
+    if fresh_inputs:
+        samples = []
+        for _ in range(repetitions):
+            args = input_factory(size)
+            start = time.perf_counter_ns()
+            func(*args)
+            samples.append((time.perf_counter_ns() - start) / 1e9)
+        return samples
+
+    number = calibrate_loops(func, args)
+    samples = []
+    for _ in range(repetitions):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func(*args)
+        samples.append((time.perf_counter_ns() - start) / number / 1e9)
+
+    return samples
+
+
+def calibrate_loops(func: Callable, args: tuple) -> int:
+    """
+    Find how many calls are needed for a single sample to take at least MIN_SAMPLE_NS.
+    """
+    number = 1
+    while True:
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func(*args)
+        if time.perf_counter_ns() - start >= MIN_SAMPLE_NS:
+            return number
+        number *= 2
+
+
+def summarise_samples(samples: List[float]) -> dict:
+    """
+    Summarise the samples of one variant at one input size.
+    """
+    ordered = sorted(samples)
+
+    return {
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": percentile(ordered, 95),
+        "p99": percentile(ordered, 99),
+        "samples": len(ordered),
+    }
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """
+    Get a percentile from sorted samples by linear interpolation between the closest ranks.
+    """
+    if len(ordered) == 1:
+        return ordered[0]
+
+    rank = (len(ordered) - 1) * pct / 100
+    lower = math.floor(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def fit_scaling(sizes: tuple, times: List[float]) -> dict:
+    """
+    Fit the median times to the candidate growth functions and a power law.
+
+    Each candidate model t = c * f(n) is fitted by least squares on the relative error so that the large sizes do not
+    drown out the small ones. The power law exponent k from t = c * n^k is fitted on a log-log scale and is
+    reported alongside the best model as a sanity check.
+
+    :return: The best model, its coefficient and error, and the power law exponent.
+    """
+    if len(sizes) < 2:
+        return {"model": None, "coefficient": None, "relative_error": None, "exponent": None}
+
+    best = None
+    for model, growth in SCALING_MODELS.items():
+        ratios = [growth(size) / max(t, 1e-12) for size, t in zip(sizes, times)]
+        coefficient = sum(ratios) / sum(ratio * ratio for ratio in ratios)
+        error = math.sqrt(statistics.fmean((coefficient * ratio - 1) ** 2 for ratio in ratios))
+
+        if best is None or error < best["relative_error"]:
+            best = {"model": model, "coefficient": coefficient, "relative_error": error}
+
+    log_sizes = [math.log(size) for size in sizes]
+    log_times = [math.log(max(t, 1e-12)) for t in times]
+    best["exponent"] = statistics.linear_regression(log_sizes, log_times).slope
+
+    return best
+
+
+def save_results(results: dict, path: str) -> None:
+    """
+    Write benchmark results to a JSON file.
+    """
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> dict:
+    """
+    Read benchmark results from a JSON file.
+    """
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare_results(baseline: dict, current: dict, threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[dict]:
+    """
+    Compare two runs and flag every variant and size whose median time, or peak memory when both runs measured it, grew
+    by more than the threshold.
+
+    Only variants and sizes present in both runs are compared.
+
+    :param baseline: The results of the earlier run.
+    :param current: The results of the new run.
+    :param threshold: The allowed relative slowdown, 0.10 allows the median to grow by 10%.
+    :return: A list of regressions, slowest first.
+    """
+    regressions = []
+
+    for group, variants in current["groups"].items():
+        for name, result in variants.items():
+            baseline_sizes = baseline["groups"].get(group, {}).get(name, {}).get("sizes", {})
+
+            for size, summary in result["sizes"].items():
+                if size not in baseline_sizes:
+                    continue
+
+                metrics = [("median", baseline_sizes[size]["median"], summary["median"])]
+                if "memory" in summary and "memory" in baseline_sizes[size]:
+                    metrics.append(("peak_bytes", baseline_sizes[size]["memory"]["peak_bytes"],
+                                    summary["memory"]["peak_bytes"]))
+
+                for metric, baseline_value, current_value in metrics:
+                    ratio = current_value / max(baseline_value, 1e-12)
+                    if ratio > 1 + threshold:
+                        regressions.append({
+                            "group": group,
+                            "variant": name,
+                            "size": int(size),
+                            "metric": metric,
+                            "baseline": baseline_value,
+                            "current": current_value,
+                            "ratio": ratio,
+                        })
+
+    return sorted(regressions, key=lambda regression: regression["ratio"], reverse=True)
+
+
+def format_results(results: dict) -> str:
+    """
+    Return a table of the results for easy printing.
+    """
+    lines = []
+
+    for group, variants in results["groups"].items():
+        lines.append(f"\n{group}")
+        lines.append(f"{'variant':<40}{'size':>8}{'min':>14}{'median':>14}{'p95':>14}{'p99':>14}"
+                     f"{'peak':>12}{'net':>12}")
+
+        for name, result in variants.items():
+            for size, summary in result["sizes"].items():
+                line = f"{name:<40}{size:>8}" + "".join(
+                    f"{summary[key] * 1e6:>12.3f}us" for key in ("min", "median", "p95", "p99"))
+                if "memory" in summary:
+                    line += f"{summary['memory']['peak_bytes']:>11}B{summary['memory']['net_bytes']:>11}B"
+                lines.append(line)
+
+            for label, key in (("time", "scaling"), ("memory", "memory_scaling")):
+                scaling = result.get(key)
+                if scaling and scaling["model"]:
+                    lines.append(f"{'':<40}{label} scaling: {scaling['model']} (n^{scaling['exponent']:.2f}, "
+                                 f"error {scaling['relative_error']:.1%})")
+
+    return "\n".join(lines)
+
+
+def format_regressions(regressions: List[dict]) -> str:
+    """
+    Return a list of regressions for easy printing.
+    """
+    if not regressions:
+        return "No regressions found."
+
+    lines = []
+    for r in regressions:
+        if r["metric"] == "median":
+            change = f"{r['baseline'] * 1e6:.3f}us -> {r['current'] * 1e6:.3f}us"
+        else:
+            change = f"{r['baseline']}B -> {r['current']}B peak"
+        lines.append(f"REGRESSION {r['group']}.{r['variant']} at size {r['size']}: {change} ({r['ratio']:.2f}x)")
+
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Run the registered benchmarks from the command line.
+
+    :return: 1 if a baseline was given and a regression was found, otherwise 0.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the registered function variants.")
+    parser.add_argument("--groups", nargs="+", choices=registered_groups(), help="The groups to run.")
+    parser.add_argument("--sizes", nargs="+", type=int, help="Override the input sizes of every group.")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--repetitions", type=int, default=DEFAULT_REPETITIONS)
+    parser.add_argument("--memory", action="store_true", help="Also measure the memory used by each variant.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--baseline", help="Compare the results with this JSON file.")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.groups, args.sizes, args.warmup, args.repetitions, args.memory)
+    print(format_results(results))
+
+    if args.output:
+        save_results(results, args.output)
+
+    if args.baseline:
+        regressions = compare_results(load_results(args.baseline), results, args.threshold)
+        print(f"\n{format_regressions(regressions)}")
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
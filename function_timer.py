@@ -1,27 +1,798 @@
 """
 A simple function timer decorator.
 
+The decorator runs in one of five modes, picked from the FUNCTION_TIMER_MODE environment variable or set_mode():
+
+    print     Print the time of every call. This is the default.
+    collect   Record the time of every call into an in-memory histogram, see snapshot_histograms().
+    profile   Record a call tree of inclusive and exclusive time, see export_collapsed_stacks().
+    memory    Record the peak, retained memory and allocated blocks of every call with tracemalloc, see
+              snapshot_memory().
+    disabled  Return the original function untouched so there is no overhead at all.
+
+The mode is read when a function is decorated, so it must be set before the modules using the decorator are imported.
+
+Helper functions can opt in to the call tree with the profile_helper decorator. It returns the helper untouched in every
+mode but profile, so helpers called in tight loops pay nothing outside of profiling.
+
+Coroutine functions are timed until the coroutine completes and generator functions until the generator is exhausted or
+closed, rather than until the coroutine or generator object is created. The time of a generator includes the time its
+consumer spends between items.
+
+Functions that make a choice at run time, such as which compressor to use, can log it with record_decision(), along
+with the value they predicted and the value that turned out, to see how often each choice is made and how accurate the
+predictions are, see snapshot_decisions(). Decisions are recorded in every mode but disabled.
+
+Every mode is thread safe. Prints are serialised, histograms are recorded into a shard per thread and merged when read,
+and the profiler tracks the current call per thread and per asyncio task.
+
 Author: Fuzzy Carter
 """
 
+import inspect
+import os
+import sys
+import threading
 import time
+import tracemalloc
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Dict, List, Optional, Tuple
+
+MODE_ENVIRONMENT_VARIABLE = "FUNCTION_TIMER_MODE"
+
+DISABLED = "disabled"
+PRINT = "print"
+COLLECT = "collect"
+PROFILE = "profile"
+MEMORY = "memory"
+MODES = (DISABLED, PRINT, COLLECT, PROFILE, MEMORY)
+
+# Bucket i counts calls that took between 2^(i-1) and 2^i - 1 nanoseconds, 64 buckets covers well over a century.
+HISTOGRAM_BUCKETS = 64
+
+
+class TimingHistogram:
+    """
+    A fixed size histogram of call times with power of two nanosecond buckets.
+
+    Each thread records into its own shard, a list of the bucket counts followed by the total time, so recording a call
+    is a bit_length() and two in-place additions with no lock taken. The shards are merged when the histogram is read.
+    Asyncio tasks share the shard of the thread running their event loop, which is safe as only one of them runs at a
+    time.
+    """
+
+    __slots__ = ("name", "shards", "local", "lock")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.shards: List[List[int]] = []
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def shard(self) -> List[int]:
+        """
+        Get the shard of the current thread, creating it if needed.
+        """
+        try:
+            return self.local.shard
+        except AttributeError:
+            shard = self.local.shard = [0] * (HISTOGRAM_BUCKETS + 1)
+            with self.lock:
+                self.shards.append(shard)
+            return shard
+
+    def record(self, elapsed_ns: int) -> None:
+        """
+        Record one call that took elapsed_ns nanoseconds.
+        """
+        shard = self.shard()
+        shard[elapsed_ns.bit_length()] += 1
+        shard[HISTOGRAM_BUCKETS] += elapsed_ns
+
+    def record_since(self, start_ns: int) -> None:
+        """
+        Record one call that started at the perf_counter_ns() time start_ns.
+        """
+        self.record(time.perf_counter_ns() - start_ns)
+
+    def reset(self) -> None:
+        """
+        Clear every recorded call.
+        """
+        with self.lock:
+            for shard in self.shards:
+                shard[:] = [0] * (HISTOGRAM_BUCKETS + 1)
+
+    def merged(self) -> List[int]:
+        """
+        Get the bucket counts and total time of every shard added together.
+        """
+        with self.lock:
+            shards = [list(shard) for shard in self.shards]
+
+        return [sum(column) for column in zip(*shards)] if shards else [0] * (HISTOGRAM_BUCKETS + 1)
+
+    def snapshot(self) -> dict:
+        """
+        Get a summary of the recorded calls.
+
+        Percentiles are estimated as the upper bound of the bucket they fall in, so they are accurate to within a
+        factor of two.
+        """
+        merged = self.merged()
+        buckets, total_ns = merged[:HISTOGRAM_BUCKETS], merged[HISTOGRAM_BUCKETS]
+        count = sum(buckets)
+
+        return {
+            "count": count,
+            "total_seconds": total_ns / 1e9,
+            "mean_seconds": total_ns / count / 1e9 if count else 0.0,
+            "p50_seconds": bucket_percentile(buckets, count, 50),
+            "p95_seconds": bucket_percentile(buckets, count, 95),
+            "p99_seconds": bucket_percentile(buckets, count, 99),
+            "buckets": {(1 << index) - 1: calls for index, calls in enumerate(buckets) if calls},
+        }
+
+
+class CallNode:
+    """
+    A node in the profiler call tree. Each node is one call path, so a helper called from two different functions has
+    two nodes.
+    """
+
+    __slots__ = ("name", "children", "calls", "inclusive_ns", "child_ns")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.children: Dict[str, CallNode] = {}
+        self.calls = 0
+        self.inclusive_ns = 0
+        self.child_ns = 0
+
+    @property
+    def exclusive_ns(self) -> int:
+        """
+        The time spent in this call path not spent in any profiled callee.
+
+        Callees running concurrently, such as tasks gathered by a coroutine, can add up to more than the caller's own
+        time, so this is never allowed to go below zero.
+        """
+        return max(0, self.inclusive_ns - self.child_ns)
+
+    def child(self, name: str) -> "CallNode":
+        """
+        Get the child node for a callee, creating it if needed.
+        """
+        node = self.children.get(name)
+        if node is None:
+            node = self.children[name] = CallNode(name)
+
+        return node
+
+    def reset(self) -> None:
+        """
+        Remove every recorded call below this node.
+        """
+        self.children = {}
+        self.calls = 0
+        self.inclusive_ns = 0
+        self.child_ns = 0
+
+    def to_dict(self) -> dict:
+        """
+        Get the call tree below this node as nested dictionaries.
+        """
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "inclusive_seconds": self.inclusive_ns / 1e9,
+            "exclusive_seconds": self.exclusive_ns / 1e9,
+            "children": [child.to_dict() for child in self.children.values()],
+        }
+
+
+class MemoryStats:
+    """
+    The memory used by the calls of one function.
+
+    Per call, peak bytes is the highest traced memory reached above what was traced when the call started, net bytes
+    is how much more is traced once it returns, and net blocks is the change in the number of allocated memory blocks.
+    Python does not count every allocation made, so net blocks stands in for an allocation count: it goes up by one
+    for every object the call creates and keeps.
+    """
+
+    __slots__ = ("name", "calls", "total_ns", "total_peak_bytes", "max_peak_bytes", "total_net_bytes",
+                 "total_net_blocks", "lock")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.reset()
+
+    def record(self, elapsed_ns: int, peak_bytes: int, net_bytes: int, net_blocks: int) -> None:
+        """
+        Record the memory used by one call.
+        """
+        with self.lock:
+            self.calls += 1
+            self.total_ns += elapsed_ns
+            self.total_peak_bytes += peak_bytes
+            self.max_peak_bytes = max(self.max_peak_bytes, peak_bytes)
+            self.total_net_bytes += net_bytes
+            self.total_net_blocks += net_blocks
+
+    def reset(self) -> None:
+        """
+        Clear every recorded call.
+        """
+        self.calls = 0
+        self.total_ns = 0
+        self.total_peak_bytes = 0
+        self.max_peak_bytes = 0
+        self.total_net_bytes = 0
+        self.total_net_blocks = 0
+
+    def snapshot(self) -> dict:
+        """
+        Get a summary of the recorded calls. Times include the overhead of tracemalloc.
+        """
+        calls = self.calls or 1
+
+        return {
+            "count": self.calls,
+            "mean_seconds": self.total_ns / calls / 1e9,
+            "mean_peak_bytes": self.total_peak_bytes / calls,
+            "max_peak_bytes": self.max_peak_bytes,
+            "mean_net_bytes": self.total_net_bytes / calls,
+            "mean_net_blocks": self.total_net_blocks / calls,
+        }
+
+
+class DecisionStats:
+    """
+    The choices made by one decision point and the accuracy of the predictions they were based on.
+
+    The error of a prediction is relative to the actual value, so 0.1 is a prediction 10% too high and -0.1 one 10%
+    too low. The mean error shows a bias in the predictions and the mean absolute error how far off they are.
+    """
+
+    __slots__ = ("name", "choices", "predictions", "total_error", "total_abs_error", "max_abs_error", "lock")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.reset()
+
+    def record(self, choice: str, predicted: Optional[float] = None, actual: Optional[float] = None) -> None:
+        """
+        Record one decision, and the accuracy of its prediction if both values are given.
+        """
+        with self.lock:
+            self.choices[choice] = self.choices.get(choice, 0) + 1
+
+            if predicted is None or actual is None:
+                return
+
+            error = (predicted - actual) / actual if actual else float(predicted != actual)
+            self.predictions += 1
+            self.total_error += error
+            self.total_abs_error += abs(error)
+            self.max_abs_error = max(self.max_abs_error, abs(error))
+
+    def reset(self) -> None:
+        """
+        Clear every recorded decision.
+        """
+        self.choices: Dict[str, int] = {}
+        self.predictions = 0
+        self.total_error = 0.0
+        self.total_abs_error = 0.0
+        self.max_abs_error = 0.0
+
+    def snapshot(self) -> dict:
+        """
+        Get a summary of the recorded decisions.
+        """
+        predictions = self.predictions or 1
+
+        return {
+            "count": sum(self.choices.values()),
+            "choices": dict(self.choices),
+            "predictions": self.predictions,
+            "mean_error": self.total_error / predictions,
+            "mean_abs_error": self.total_abs_error / predictions,
+            "max_abs_error": self.max_abs_error,
+        }
+
+
+_mode = os.environ.get(MODE_ENVIRONMENT_VARIABLE, PRINT).lower()
+if _mode not in MODES:
+    raise ValueError(f"{MODE_ENVIRONMENT_VARIABLE} must be one of {MODES}, not {_mode!r}.")
+
+_histograms: Dict[str, TimingHistogram] = {}
+
+_memory_stats: Dict[str, MemoryStats] = {}
+
+_decisions: Dict[str, DecisionStats] = {}
+
+# tracemalloc keeps a single peak, which every measured call resets. Each thread keeps a stack with the highest peak
+# seen so far by every call it has running, so an outer call still sees the peaks reached inside its callees.
+_memory_peaks = threading.local()
+
+_print_lock = threading.Lock()
+
+# Each thread builds its call tree from its own root and the roots are merged when the tree is exported. The innermost
+# profiled call is tracked in a context variable so that asyncio tasks, and threads started with asyncio.to_thread, each
+# see their own call path. A call path can be shared between threads that way, so the tree is only changed under a lock.
+_current_call_node: ContextVar[Optional[CallNode]] = ContextVar("current_call_node", default=None)
+_thread_roots = threading.local()
+_call_roots: List[CallNode] = []
+_call_tree_lock = threading.Lock()
+
+
+def set_mode(mode: str) -> None:
+    """
+    Set the mode used for functions decorated from now on.
+
+    :param mode: One of MODES.
+    """
+    global _mode
+
+    if mode not in MODES:
+        raise ValueError(f"Function timer mode must be one of {MODES}, not {mode!r}.")
+
+    _mode = mode
+
+
+def get_mode() -> str:
+    """
+    Get the mode used for functions decorated from now on.
+    """
+    return _mode
 
 
 def function_timer(func) -> callable:
     """
     A decorator that times a function.
+
+    The original function is kept on the wrapper as __wrapped__ so tools such as the benchmark harness can time it
+    without the per-call print.
+    """
+    if _mode == DISABLED:
+        return func
+
+    if _mode == COLLECT:
+        return timed_wrapper(func, *collecting_recorder(func))
+
+    if _mode == PROFILE:
+        return timed_wrapper(func, *profiling_recorder(func))
+
+    if _mode == MEMORY:
+        return timed_wrapper(func, *memory_recorder(func))
+
+    return timed_wrapper(func, *printing_recorder(func))
+
+
+def profile_helper(func) -> callable:
+    """
+    A decorator that opts a helper function in to the profiler call tree.
+
+    Outside of profile mode the helper is returned untouched.
     """
+    if _mode != PROFILE:
+        return func
 
+    return timed_wrapper(func, *profiling_recorder(func))
+
+
+def timed_wrapper(func, begin: Callable[[], object], end: Callable[[object], None]) -> callable:
+    """
+    Wrap a function so that begin is called when it starts running and end is called with whatever begin returned
+    once it has finished.
+
+    Coroutine functions finish when the coroutine completes, generator functions when the generator is exhausted or
+    closed.
+    """
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def coroutine_wrapper(*args, **kwargs):
+            """
+            A wrapper that times a coroutine through to completion.
+            """
+            token = begin()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                end(token)
+
+        return coroutine_wrapper
+
+    if inspect.isasyncgenfunction(func):
+        @wraps(func)
+        async def async_generator_wrapper(*args, **kwargs):
+            """
+            A wrapper that times an async generator through to exhaustion. Values sent with asend() are not forwarded.
+            """
+            token = begin()
+            try:
+                async for item in func(*args, **kwargs):
+                    yield item
+            finally:
+                end(token)
+
+        return async_generator_wrapper
+
+    if inspect.isgeneratorfunction(func):
+        @wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            """
+            A wrapper that times a generator through to exhaustion.
+            """
+            token = begin()
+            try:
+                return (yield from func(*args, **kwargs))
+            finally:
+                end(token)
+
+        return generator_wrapper
+
+    @wraps(func)
     def wrapper(*args, **kwargs):
         """
         A wrapper that times a function.
         """
-        start = time.perf_counter()
+        token = begin()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            end(token)
+
+    return wrapper
+
+
+# -- Recorders ----------------------------------------------------------------
+# A recorder is the begin and end pair passed to timed_wrapper for one mode.
+
+def printing_recorder(func) -> Tuple[Callable, Callable]:
+    """
+    Print the time of every call. Prints from different threads are serialised so lines are never interleaved.
+    """
+
+    def end(start: float) -> None:
+        elapsed = time.perf_counter() - start
+        with _print_lock:
+            print(f"Function {func.__name__} took {elapsed:.10f} seconds to complete.")
+
+    return time.perf_counter, end
+
+
+def collecting_recorder(func) -> Tuple[Callable, Callable]:
+    """
+    Record the time of every call into the function's histogram.
+    """
+    return time.perf_counter_ns, get_histogram(qualified_name(func)).record_since
+
+
+def profiling_recorder(func) -> Tuple[Callable, Callable]:
+    """
+    Record the time of every call into the call tree under whichever profiled function called it.
+
+    Generators only become the current call while they are created, not while they are suspended, as they run in their
+    consumer's context. Functions they call are recorded under their consumer instead.
+    """
+    name = qualified_name(func)
+    nests = not (inspect.isgeneratorfunction(func) or inspect.isasyncgenfunction(func))
+    perf_counter_ns = time.perf_counter_ns
+
+    def begin() -> tuple:
+        parent = current_call_node()
+        with _call_tree_lock:
+            node = parent.child(name)
+        token = _current_call_node.set(node) if nests else None
+
+        return parent, node, token, perf_counter_ns()
+
+    def end(state: tuple) -> None:
+        parent, node, token, start = state
+        elapsed = perf_counter_ns() - start
+        with _call_tree_lock:
+            node.calls += 1
+            node.inclusive_ns += elapsed
+            parent.child_ns += elapsed
+
+        if token is not None:
+            _current_call_node.reset(token)
+
+    return begin, end
+
+
+def memory_recorder(func) -> Tuple[Callable, Callable]:
+    """
+    Record the time, peak memory, retained memory and allocated blocks of every call.
+
+    tracemalloc is started when the first function is decorated, so only allocations made after that are seen. It
+    traces the whole process, so calls running on other threads at the same time show up in each other's numbers.
+    """
+    stats = get_memory_stats(qualified_name(func))
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    return begin_memory_measurement, lambda state: stats.record(*end_memory_measurement(state))
+
+
+def begin_memory_measurement() -> tuple:
+    """
+    Start measuring the memory used by a call.
+
+    :return: The state to pass to end_memory_measurement.
+    """
+    peaks = getattr(_memory_peaks, "stack", None)
+    if peaks is None:
+        peaks = _memory_peaks.stack = []
+
+    current, peak = tracemalloc.get_traced_memory()
+    if peaks:
+        peaks[-1] = max(peaks[-1], peak)
+
+    peaks.append(current)
+    tracemalloc.reset_peak()
+
+    return current, sys.getallocatedblocks(), time.perf_counter_ns()
+
+
+def end_memory_measurement(state: tuple) -> Tuple[int, int, int, int]:
+    """
+    Finish measuring the memory used by a call.
+
+    :param state: The state returned by begin_memory_measurement.
+    :return: The elapsed nanoseconds, peak bytes, net bytes and net blocks of the call.
+    """
+    start_bytes, start_blocks, start_ns = state
+    elapsed_ns = time.perf_counter_ns() - start_ns
+    net_blocks = sys.getallocatedblocks() - start_blocks
+    current, peak = tracemalloc.get_traced_memory()
+
+    peaks = _memory_peaks.stack
+    peak = max(peak, peaks.pop())
+    if peaks:
+        peaks[-1] = max(peaks[-1], peak)
+
+    return elapsed_ns, peak - start_bytes, current - start_bytes, net_blocks
+
+
+def measure_call_memory(func, *args, **kwargs) -> Tuple[object, dict]:
+    """
+    Call a function once and measure the memory it used, starting tracemalloc for the call if it is not running.
+
+    :return: The output of the function and a dictionary of its peak bytes, net bytes and net blocks.
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+
+    state = begin_memory_measurement()
+    try:
         output = func(*args, **kwargs)
-        end = time.perf_counter()
+    finally:
+        _, peak_bytes, net_bytes, net_blocks = end_memory_measurement(state)
+        if started:
+            tracemalloc.stop()
 
-        print(f"Function {func.__name__} took {end - start:.10f} seconds to complete.")
+    return output, {"peak_bytes": peak_bytes, "net_bytes": net_bytes, "net_blocks": net_blocks}
 
-        return output
 
-    return wrapper
+def qualified_name(func) -> str:
+    """
+    Get the module qualified name used to report a function.
+    """
+    return f"{func.__module__}.{func.__qualname__}"
+
+
+# -- Histograms ---------------------------------------------------------------
+
+def get_histogram(name: str) -> TimingHistogram:
+    """
+    Get the histogram for a function, creating it if needed.
+
+    :param name: The module qualified name of the function.
+    """
+    if name not in _histograms:
+        _histograms[name] = TimingHistogram(name)
+
+    return _histograms[name]
+
+
+def snapshot_histograms() -> Dict[str, dict]:
+    """
+    Get a summary of the calls recorded by every function decorated in collect mode.
+
+    :return: A dictionary of summaries keyed by the module qualified function name.
+    """
+    return {name: histogram.snapshot() for name, histogram in list(_histograms.items())}
+
+
+def reset_histograms() -> None:
+    """
+    Clear the calls recorded by every function decorated in collect mode.
+    """
+    for histogram in list(_histograms.values()):
+        histogram.reset()
+
+
+def bucket_percentile(buckets: list, count: int, pct: float) -> float:
+    """
+    Estimate a percentile in seconds from histogram buckets.
+    """
+    if not count:
+        return 0.0
+
+    target = count * pct / 100
+    seen = 0
+    for index, calls in enumerate(buckets):
+        seen += calls
+        if seen >= target:
+            return ((1 << index) - 1) / 1e9
+
+    return ((1 << (len(buckets) - 1)) - 1) / 1e9
+
+
+# -- Memory -------------------------------------------------------------------
+
+def get_memory_stats(name: str) -> MemoryStats:
+    """
+    Get the memory stats for a function, creating them if needed.
+
+    :param name: The module qualified name of the function.
+    """
+    if name not in _memory_stats:
+        _memory_stats[name] = MemoryStats(name)
+
+    return _memory_stats[name]
+
+
+def snapshot_memory() -> Dict[str, dict]:
+    """
+    Get a summary of the memory used by every function decorated in memory mode.
+
+    :return: A dictionary of summaries keyed by the module qualified function name.
+    """
+    return {name: stats.snapshot() for name, stats in list(_memory_stats.items())}
+
+
+def reset_memory() -> None:
+    """
+    Clear the memory recorded by every function decorated in memory mode.
+    """
+    for stats in list(_memory_stats.values()):
+        with stats.lock:
+            stats.reset()
+
+
+# -- Decisions ----------------------------------------------------------------
+
+def record_decision(name: str, choice: str, predicted: Optional[float] = None, actual: Optional[float] = None) -> None:
+    """
+    Record a choice made at run time, and the prediction it was based on once the actual value is known.
+
+    :param name: The name of the decision point, such as the module qualified name of the function making it.
+    :param choice: The choice made.
+    :param predicted: The value the choice was based on, such as a predicted size.
+    :param actual: The value that turned out.
+    """
+    if _mode == DISABLED:
+        return
+
+    if name not in _decisions:
+        _decisions[name] = DecisionStats(name)
+
+    _decisions[name].record(choice, predicted, actual)
+
+
+def snapshot_decisions() -> Dict[str, dict]:
+    """
+    Get a summary of the choices and prediction accuracy of every decision point.
+
+    :return: A dictionary of summaries keyed by the name of the decision point.
+    """
+    return {name: stats.snapshot() for name, stats in list(_decisions.items())}
+
+
+def reset_decisions() -> None:
+    """
+    Clear the decisions recorded by every decision point.
+    """
+    for stats in list(_decisions.values()):
+        with stats.lock:
+            stats.reset()
+
+
+# -- Call Tree ----------------------------------------------------------------
+
+def current_call_node() -> CallNode:
+    """
+    Get the call tree node of the innermost profiled call running in this context, or the root of this thread.
+    """
+    node = _current_call_node.get()
+    if node is not None:
+        return node
+
+    root = getattr(_thread_roots, "root", None)
+    if root is None:
+        root = _thread_roots.root = CallNode(threading.current_thread().name)
+        with _call_tree_lock:
+            _call_roots.append(root)
+
+    return root
+
+
+def merged_call_tree() -> CallNode:
+    """
+    Merge the call trees of every thread into a single tree.
+    """
+    merged = CallNode("root")
+
+    with _call_tree_lock:
+        for root in _call_roots:
+            merge_call_nodes(merged, root)
+
+    return merged
+
+
+def merge_call_nodes(target: CallNode, source: CallNode) -> None:
+    """
+    Add the calls recorded below source to the children of target.
+    """
+    for name, child in source.children.items():
+        merged = target.child(name)
+        merged.calls += child.calls
+        merged.inclusive_ns += child.inclusive_ns
+        merged.child_ns += child.child_ns
+        target.child_ns += child.inclusive_ns
+        merge_call_nodes(merged, child)
+
+    target.inclusive_ns = max(target.inclusive_ns, target.child_ns)
+
+
+def snapshot_call_tree() -> dict:
+    """
+    Get the profiler call tree of every thread merged together as nested dictionaries.
+    """
+    return merged_call_tree().to_dict()
+
+
+def export_collapsed_stacks() -> str:
+    """
+    Export the profiler call tree in the collapsed stack format read by flamegraph.pl and speedscope.
+
+    Each line is a semicolon separated call path followed by the exclusive time spent in it, in microseconds.
+    """
+    lines = []
+    stack = [(child, child.name) for child in merged_call_tree().children.values()]
+
+    while stack:
+        node, path = stack.pop()
+        exclusive_us = node.exclusive_ns // 1000
+        if exclusive_us:
+            lines.append(f"{path} {exclusive_us}")
+
+        stack.extend((child, f"{path};{child.name}") for child in node.children.values())
+
+    return "\n".join(sorted(lines))
+
+
+def write_collapsed_stacks(path: str) -> None:
+    """
+    Write the profiler call tree to a file in the collapsed stack format.
+    """
+    with open(path, "w") as file:
+        file.write(export_collapsed_stacks() + "\n")
+
+
+def reset_call_tree() -> None:
+    """
+    Clear the profiler call tree of every thread. Calls running while the tree is reset are not recorded.
+    """
+    with _call_tree_lock:
+        for root in _call_roots:
+            root.reset()
@@ -0,0 +1,362 @@
+"""
+Benchmark suites comparing the solution variants for each strings and arrays problem.
+
+Run this file to benchmark every suite, or pass --groups to pick a few. Use --output to save the results as JSON and
+--baseline to compare the run with a saved one and flag regressions.
+
+Author: Fuzzy Carter
+"""
+
+import inspect
+import random
+from string import ascii_letters, ascii_lowercase
+
+from benchmark import main, register_group, register_variant
+from edit_distance import (bounded_edit_distance, bounded_edit_distance_banded, bounded_edit_distance_bit_parallel,
+                           one_away_edit_distance)
+from is_permutation import (is_permutation_character_count, is_permutation_code_point_count,
+                            is_permutation_string_equal_string)
+from is_unique import (BMP_SIZE, LATIN_1_SIZE, is_unique_batch, is_unique_bitset, is_unique_bool, is_unique_no_ds,
+                       is_unique_no_ds_sorted, is_unique_set, unique_code_point_bitset, unique_latin_1_bitmask)
+from one_away import OneAwayIndex, one_away_batch, one_away_cleaner, one_away_single_loop, one_away_slices
+from palindrome_permutation import (is_palindrome_permutation_batch, is_palindrome_permutation_bit_vector,
+                                    is_palindrome_permutation_hash_table, is_palindrome_permutation_odd_count,
+                                    is_palindrome_permutation_unicode)
+from rotation_index import group_rotations
+from rotate_matrix import (rotate_matrix_groups_of_four, rotate_matrix_one_cell_at_a_time,
+                           rotate_matrix_transpose_and_reverse)
+from string_compression import (compress_concatenation, compress_count_occurrences, compress_run_boundaries,
+                                compress_string_builder)
+from string_rotation import is_rotation, is_rotation_two_way
+from url_encode import url_encode, url_encode_pythonic
+from zero_matrix import zero_matrix_boolean_arrays, zero_matrix_boolean_arrays_pythonic, zero_matrix_source_matrix
+
+# Alphabets for the palindrome permutation suites, a mix of scripts and a large alphabet of CJK characters.
+MULTILINGUAL_CHARACTERS = "abcdéèàüößçñ ΑΒΓαβγДЖжд日本語 ,."
+CJK_CHARACTERS = "".join(map(chr, range(0x4E00, 0x4E00 + 20000)))
+
+
+# -- Input Factories ----------------------------------------------------------
+
+
+def random_string(size: int, alphabet: str = ascii_lowercase, seed: int = 0) -> str:
+    """
+    Build a reproducible random string of the given size.
+    """
+    generator = random.Random(size * 31 + seed)
+    return "".join(generator.choices(alphabet, k=size))
+
+
+def near_copies(size: int) -> str:
+    """
+    Build four copies of a random block and one more character, so every slice of it repeats but it is not periodic.
+    """
+    return random_string(size // 4) * 4 + "!"
+
+
+def unique_string(size: int) -> str:
+    """
+    Build a string of unique characters. Sizes over 128 are rejected by the is_unique solutions.
+    """
+    return "".join(chr(i) for i in range(size))
+
+
+def unique_bmp_string(size: int) -> str:
+    """
+    Build a string of unique CJK characters from the Basic Multilingual Plane.
+    """
+    return "".join(chr(0x4E00 + i) for i in range(size))
+
+
+def run_heavy_string(size: int) -> str:
+    """
+    Build a string made of runs between 1 and 16 characters long.
+    """
+    generator = random.Random(size)
+    runs = []
+    length = 0
+    while length < size:
+        run = min(generator.randint(1, 16), size - length)
+        runs.append(generator.choice(ascii_letters) * run)
+        length += run
+
+    return "".join(runs)
+
+
+def identifier_batch(size: int) -> list:
+    """
+    Build a batch of short identifiers as byte strings, some unique and some not.
+    """
+    generator = random.Random(size)
+    return [bytes(generator.choices(ascii_letters.encode(), k=generator.randint(4, 16))) for _ in range(size)]
+
+
+def loop_is_unique_set(strings: list) -> list:
+    """
+    Check a batch of strings by calling is_unique_set on each one, the baseline for is_unique_batch.
+    """
+    check = inspect.unwrap(is_unique_set)
+    return [check(string) for string in strings]
+
+
+def phrase_batch(size: int) -> list:
+    """
+    Build a batch of short mixed case phrases with spaces and punctuation.
+    """
+    generator = random.Random(size)
+    return ["".join(generator.choices(ascii_letters + "  ,.!", k=generator.randint(10, 60))) for _ in range(size)]
+
+
+def loop_is_palindrome_permutation_bit_vector(phrases: list) -> list:
+    """
+    Check a batch of phrases by calling is_palindrome_permutation_bit_vector on each one, the baseline for
+    is_palindrome_permutation_batch.
+    """
+    check = inspect.unwrap(is_palindrome_permutation_bit_vector)
+    return [check(phrase) for phrase in phrases]
+
+
+def square_matrix(size: int) -> list[list]:
+    """
+    Build a size x size matrix of integers with a zero on every tenth row.
+    """
+    matrix = [[row * size + column + 1 for column in range(size)] for row in range(size)]
+    for row in range(0, size, 10):
+        matrix[row][(row * 7) % size] = 0
+
+    return matrix
+
+
+def one_edit_pair(size: int) -> tuple:
+    """
+    Build two strings one replacement apart, with the difference in the middle.
+    """
+    first = random_string(size)
+    middle = size // 2
+    second = first[:middle] + ("b" if first[middle] == "a" else "a") + first[middle + 1:]
+
+    return first, second
+
+
+def word_dictionary(size: int) -> tuple:
+    """
+    Build a dictionary of random words, the same dictionary indexed, and a query one edit from one of the words.
+    """
+    generator = random.Random(size)
+    words = list({"".join(generator.choices(ascii_lowercase, k=generator.randint(4, 12))) for _ in range(size)})
+    word = words[size // 2]
+    query = word[:2] + "z" + word[3:]
+
+    return words, OneAwayIndex(words), query
+
+
+def loop_one_away_single_loop(words: list, index: OneAwayIndex, query: str) -> list:
+    """
+    Find the words one edit from the query by calling one_away_single_loop on every word, the baseline for
+    OneAwayIndex.
+    """
+    check = inspect.unwrap(one_away_single_loop)
+    return [word for word in words if check(word, query)]
+
+
+def edit_pair_batch(size: int) -> list:
+    """
+    Build a batch of 40 character string pairs, a third one edit apart, a third two edits apart and a third with
+    different lengths.
+    """
+    pairs = []
+    for index in range(size):
+        first = random_string(40, seed=index)
+        if index % 3 == 0:
+            pairs.append((first, first[:20] + "z" + first[21:]))
+        elif index % 3 == 1:
+            pairs.append((first, "z" + first[1:30] + "z" + first[31:]))
+        else:
+            pairs.append((first, first[:-3]))
+
+    return pairs
+
+
+def loop_one_away_pairs(pairs: list) -> list:
+    """
+    Check a batch of pairs by calling one_away_single_loop on each one, the baseline for one_away_batch.
+    """
+    check = inspect.unwrap(one_away_single_loop)
+    return [check(first, second) for first, second in pairs]
+
+
+def circular_reads(size: int) -> list:
+    """
+    Build a batch of 32 base DNA reads, where every read is a rotation of one of size // 4 circular sequences.
+    """
+    generator = random.Random(size)
+    sequences = ["".join(generator.choices("ACGT", k=32)) for _ in range(max(1, size // 4))]
+    reads = []
+    for _ in range(size):
+        sequence = generator.choice(sequences)
+        start = generator.randrange(32)
+        reads.append(sequence[start:] + sequence[:start])
+
+    return reads
+
+
+def pairwise_group_rotations(reads: list) -> list:
+    """
+    Group reads by calling is_rotation against the first read of every group so far, the baseline for
+    group_rotations.
+    """
+    check = inspect.unwrap(is_rotation)
+    groups = []
+    for read in reads:
+        for group in groups:
+            if check(group[0], read):
+                if read not in group:
+                    group.append(read)
+                break
+        else:
+            groups.append([read])
+
+    return [group for group in groups if len(group) > 1]
+
+
+def scattered_edit_pair(size: int) -> tuple:
+    """
+    Build two strings three replacements apart, with the differences spread over the string.
+    """
+    first = random_string(size)
+    second = list(first)
+    for index in (size // 4, size // 2, 3 * size // 4):
+        second[index] = "b" if first[index] == "a" else "a"
+
+    return first, "".join(second)
+
+
+# -- Suites -------------------------------------------------------------------
+
+register_group("string_compression", lambda size: (run_heavy_string(size),), sizes=(64, 256, 1024, 4096, 16384))
+register_variant("string_compression", compress_concatenation)
+register_variant("string_compression", compress_string_builder)
+register_variant("string_compression", compress_count_occurrences)
+register_variant("string_compression", compress_run_boundaries)
+
+register_group("string_compression_large", lambda size: (run_heavy_string(size),), sizes=(1 << 20, 1 << 22))
+register_variant("string_compression_large", compress_string_builder)
+register_variant("string_compression_large", compress_count_occurrences)
+register_variant("string_compression_large", compress_run_boundaries)
+
+register_group("is_unique", lambda size: (unique_string(size),), sizes=(8, 16, 32, 64, 128))
+register_variant("is_unique", is_unique_no_ds)
+register_variant("is_unique", is_unique_no_ds_sorted)
+register_variant("is_unique", is_unique_set)
+register_variant("is_unique", is_unique_bool)
+
+# The bitsets against the sets is_unique_bitset picks from, as strings get longer. is_unique_set rejects anything over
+# 128 characters, so the BMP suite compares the bitset with one set built in C.
+register_group("is_unique_bitset", lambda size: (unique_string(size),), sizes=(2, 4, 8, 16, 32, 64, 128))
+register_variant("is_unique_bitset", is_unique_set)
+register_variant("is_unique_bitset", is_unique_bool)
+register_variant("is_unique_bitset", unique_latin_1_bitmask)
+register_variant("is_unique_bitset", lambda string: unique_code_point_bitset(string.encode("latin-1"), LATIN_1_SIZE),
+                 name="code_point_bitset")
+register_variant("is_unique_bitset", is_unique_bitset)
+
+register_group("is_unique_bmp", lambda size: (unique_bmp_string(size),), sizes=(4, 64, 1024, 16384))
+register_variant("is_unique_bmp", lambda string: len(set(string)) == len(string), name="set_length")
+register_variant("is_unique_bmp", lambda string: unique_code_point_bitset(map(ord, string), BMP_SIZE),
+                 name="code_point_bitset")
+register_variant("is_unique_bmp", is_unique_bitset)
+
+register_group("is_unique_batch", lambda size: (identifier_batch(size),), sizes=(100, 1000, 10000, 100000))
+register_variant("is_unique_batch", loop_is_unique_set)
+register_variant("is_unique_batch", is_unique_batch)
+
+register_group("is_permutation", lambda size: (random_string(size), random_string(size)[::-1]))
+register_variant("is_permutation", is_permutation_string_equal_string)
+register_variant("is_permutation", is_permutation_character_count)
+register_variant("is_permutation", is_permutation_code_point_count)
+
+register_group("one_away", one_edit_pair, sizes=(16, 256, 4096, 65536))
+register_variant("one_away", one_away_cleaner)
+register_variant("one_away", one_away_single_loop)
+register_variant("one_away", one_away_edit_distance)
+register_variant("one_away", one_away_slices)
+
+register_group("one_away_lookup", word_dictionary, sizes=(100, 1000, 10000, 100000))
+register_variant("one_away_lookup", loop_one_away_single_loop)
+register_variant("one_away_lookup", lambda words, index, query: index.within_one_edit(query), name="one_away_index")
+
+register_group("one_away_batch", lambda size: (edit_pair_batch(size),), sizes=(1000, 10000, 100000))
+register_variant("one_away_batch", loop_one_away_pairs)
+register_variant("one_away_batch", lambda pairs: list(inspect.unwrap(one_away_batch)(pairs, processes=1)),
+                 name="batch_in_process")
+register_variant("one_away_batch", lambda pairs: list(inspect.unwrap(one_away_batch)(pairs)),
+                 name="batch_process_pool")
+
+# Names with a few scattered edits, bounded at k = 3, the case for fuzzy dedup.
+register_group("edit_distance", lambda size: (*scattered_edit_pair(size), 3), sizes=(16, 64, 256, 1024, 4096))
+register_variant("edit_distance", bounded_edit_distance_banded)
+register_variant("edit_distance", bounded_edit_distance_bit_parallel)
+register_variant("edit_distance", bounded_edit_distance)
+
+register_group("palindrome_permutation", lambda size: (random_string(size, ascii_letters + " "),))
+register_variant("palindrome_permutation", is_palindrome_permutation_hash_table)
+register_variant("palindrome_permutation", is_palindrome_permutation_odd_count)
+register_variant("palindrome_permutation", is_palindrome_permutation_bit_vector)
+register_variant("palindrome_permutation", is_palindrome_permutation_unicode)
+
+register_group("palindrome_permutation_multilingual", lambda size: (random_string(size, MULTILINGUAL_CHARACTERS),),
+               sizes=(256, 4096, 65536))
+register_variant("palindrome_permutation_multilingual", is_palindrome_permutation_unicode)
+
+# A large alphabet against ASCII text of the same lengths, to show the cost per character does not grow with it.
+register_group("palindrome_permutation_cjk", lambda size: (random_string(size, CJK_CHARACTERS),),
+               sizes=(4096, 65536, 1 << 20))
+register_variant("palindrome_permutation_cjk", is_palindrome_permutation_unicode)
+
+register_group("palindrome_permutation_ascii", lambda size: (random_string(size, ascii_letters + " "),),
+               sizes=(4096, 65536, 1 << 20))
+register_variant("palindrome_permutation_ascii", is_palindrome_permutation_unicode)
+
+register_group("palindrome_permutation_batch", lambda size: (phrase_batch(size),), sizes=(100, 1000, 10000, 100000))
+register_variant("palindrome_permutation_batch", loop_is_palindrome_permutation_bit_vector)
+register_variant("palindrome_permutation_batch", is_palindrome_permutation_batch)
+
+register_group("rotate_matrix", lambda size: (square_matrix(size),), sizes=(8, 16, 32, 64, 128), fresh_inputs=True)
+register_variant("rotate_matrix", rotate_matrix_groups_of_four)
+register_variant("rotate_matrix", rotate_matrix_transpose_and_reverse)
+register_variant("rotate_matrix", rotate_matrix_one_cell_at_a_time)
+
+register_group("zero_matrix", lambda size: (square_matrix(size),), sizes=(8, 16, 32, 64, 128), fresh_inputs=True)
+register_variant("zero_matrix", zero_matrix_boolean_arrays)
+register_variant("zero_matrix", zero_matrix_boolean_arrays_pythonic)
+register_variant("zero_matrix", zero_matrix_source_matrix)
+
+register_group("url_encode", lambda size: (random_string(size, ascii_lowercase + "  "),))
+register_variant("url_encode", url_encode)
+register_variant("url_encode", url_encode_pythonic)
+
+register_group("string_rotation", lambda size: (random_string(size), random_string(size)[size // 3:] +
+                                                random_string(size)[:size // 3]))
+register_variant("string_rotation", is_rotation)
+register_variant("string_rotation", is_rotation_two_way)
+
+register_group("string_rotation_periodic", lambda size: ("a" * size + "b", "a" * (size // 2) + "b" +
+                                                         "a" * (size - size // 2)), sizes=(1024, 1 << 16, 1 << 20))
+register_variant("string_rotation_periodic", is_rotation)
+register_variant("string_rotation_periodic", is_rotation_two_way)
+
+register_group("string_rotation_blocks", lambda size: (near_copies(size), near_copies(size)[size // 7:] +
+                                                       near_copies(size)[:size // 7]),
+               sizes=(1 << 14, 1 << 16, 1 << 20))
+register_variant("string_rotation_blocks", is_rotation)
+register_variant("string_rotation_blocks", is_rotation_two_way)
+
+register_group("rotation_grouping", lambda size: (circular_reads(size),), sizes=(100, 400, 1600))
+register_variant("rotation_grouping", pairwise_group_rotations)
+register_variant("rotation_grouping", group_rotations)
+
+
+# -- Main ---------------------------------------------------------------------
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,268 @@
+"""
+Bounded Edit Distance: Given two strings and a bound k, find the edit distance between them if it is at most k. An edit
+is inserting, removing or replacing a character, so one_away is the case k = 1.
+
+Example:
+kitten, sitting, k = 3 -> 3
+kitten, sitting, k = 2 -> None
+pale, ple, k = 1 -> 1
+
+Solution 1: Ukkonen's banded dynamic programming
+Solution 2: Myers' bit-parallel algorithm
+Solution 3: one_away as the k = 1 case
+
+Author: Fuzzy Carter
+"""
+
+from typing import Dict, Optional
+
+from function_timer import function_timer, profile_helper
+
+# Banded dynamic programming costs O(k) per row while the bit-parallel algorithm costs O(m / w) per column, so the band
+# wins for one edit, or once the shorter string is this many characters long for each edit allowed.
+BANDED_MAX_BOUND = 1
+BANDED_MIN_LENGTH_PER_EDIT = 1024
+
+
+@function_timer
+def bounded_edit_distance_banded(first_string: str, second_string: str, max_distance: int) -> Optional[int]:
+    """
+    Find the edit distance with Ukkonen's banded dynamic programming.
+
+    A cell more than max_distance away from the diagonal needs more than max_distance edits to reach, so only the band
+    of 2k + 1 cells around the diagonal is filled in for each row. The search stops as soon as every cell in a row is
+    over the bound.
+
+    Time Complexity: O(k * n)
+    Space Complexity: O(k)
+
+    :param first_string: The first string to compare.
+    :param second_string: The second string to compare.
+    :param max_distance: The largest distance to look for.
+    :return: The edit distance, or None if it is more than max_distance.
+    """
+    first_string, second_string = trim_common_affixes(first_string, second_string)
+
+    if abs(len(first_string) - len(second_string)) > max_distance:
+        return None
+
+    return banded_distance(first_string, second_string, max_distance)
+
+
+@function_timer
+def bounded_edit_distance_bit_parallel(first_string: str, second_string: str,
+                                       max_distance: Optional[int] = None) -> Optional[int]:
+    """
+    Find the edit distance with Myers' bit-parallel algorithm, in Hyyrö's form for global edit distance.
+
+    Each column of the dynamic programming table is held as two bit vectors of the vertical differences between
+    neighbouring cells, one for +1 and one for -1. A whole column is updated with a handful of bitwise operations and
+    one addition, on Python ints that are as wide as the shorter string. The search stops once the distance could no
+    longer come back under the bound in the columns that are left.
+
+    Time Complexity: O(n * ceil(m / w)), where m is the shorter string and w is the machine word size
+    Space Complexity: O(m + a), where a is the size of the alphabet of the shorter string
+
+    :param first_string: The first string to compare.
+    :param second_string: The second string to compare.
+    :param max_distance: The largest distance to look for, or None for no bound.
+    :return: The edit distance, or None if it is more than max_distance.
+    """
+    first_string, second_string = trim_common_affixes(first_string, second_string)
+
+    if max_distance is not None and abs(len(first_string) - len(second_string)) > max_distance:
+        return None
+
+    return bit_parallel_distance(first_string, second_string, max_distance)
+
+
+@function_timer
+def bounded_edit_distance(first_string: str, second_string: str, max_distance: int) -> Optional[int]:
+    """
+    Find the edit distance if it is at most max_distance, picking the faster algorithm for the bound.
+
+    The common prefix and suffix are trimmed first since they never need editing. One edit, or long strings with few
+    edits, use the banded dynamic programming and everything else the bit-parallel algorithm.
+
+    Time Complexity: O(min(k * n, n * ceil(m / w)))
+    Space Complexity: O(k + m + a)
+
+    :param first_string: The first string to compare.
+    :param second_string: The second string to compare.
+    :param max_distance: The largest distance to look for.
+    :return: The edit distance, or None if it is more than max_distance.
+    """
+    first_string, second_string = trim_common_affixes(first_string, second_string)
+
+    if abs(len(first_string) - len(second_string)) > max_distance:
+        return None
+
+    shorter = min(len(first_string), len(second_string))
+    if max_distance <= BANDED_MAX_BOUND or shorter >= BANDED_MIN_LENGTH_PER_EDIT * max_distance:
+        return banded_distance(first_string, second_string, max_distance)
+
+    return bit_parallel_distance(first_string, second_string, max_distance)
+
+
+@function_timer
+def one_away_edit_distance(first_string: str, second_string: str) -> bool:
+    """
+    Check if the strings are one edit (or zero edits) away, as bounded_edit_distance with k = 1.
+
+    With the common prefix and suffix trimmed, two strings one edit apart are left with at most one character each, so
+    the band of three cells per row is only ever filled in for a single row.
+
+    Time Complexity: O(n)
+    Space Complexity: O(1)
+
+    :param first_string: The first string to compare.
+    :param second_string: The second string to compare.
+    :return: True if the strings are one edit away from being equal.
+    """
+    first_string, second_string = trim_common_affixes(first_string, second_string)
+
+    if len(first_string) > 1 or len(second_string) > 1:
+        return False
+
+    return banded_distance(first_string, second_string, 1) is not None
+
+
+# -- Helper Functions ---------------------------------------------------------
+
+@profile_helper
+def trim_common_affixes(first_string: str, second_string: str) -> tuple:
+    """
+    Remove the prefix and suffix two strings share, which never affect their edit distance.
+    """
+    shorter = min(len(first_string), len(second_string))
+
+    prefix = 0
+    while prefix < shorter and first_string[prefix] == second_string[prefix]:
+        prefix += 1
+
+    suffix = 0
+    while suffix < shorter - prefix and first_string[-1 - suffix] == second_string[-1 - suffix]:
+        suffix += 1
+
+    return (first_string[prefix:len(first_string) - suffix],
+            second_string[prefix:len(second_string) - suffix])
+
+
+@profile_helper
+def banded_distance(first_string: str, second_string: str, max_distance: int) -> Optional[int]:
+    """
+    Fill in the band of the edit distance table within max_distance of the diagonal, one row at a time.
+
+    Cells outside the band are treated as max_distance + 1, which is all that matters about them.
+    """
+    over = max_distance + 1
+    width = len(second_string)
+    band = 2 * max_distance + 1
+
+    # Cell (row, column) is kept at offset column - row + max_distance, so each row only holds its band.
+    previous = [over] * max_distance + list(range(max_distance + 1))
+
+    for row in range(1, len(first_string) + 1):
+        first_char = first_string[row - 1]
+        current = [over] * band
+        row_min = over
+
+        for offset in range(band):
+            column = row + offset - max_distance
+            if column < 0:
+                continue
+            if column > width:
+                break
+
+            if column == 0:
+                cost = row if row <= max_distance else over
+            else:
+                cost = previous[offset] + (first_char != second_string[column - 1])
+                if offset + 1 < band and previous[offset + 1] + 1 < cost:
+                    cost = previous[offset + 1] + 1
+                if offset > 0 and current[offset - 1] + 1 < cost:
+                    cost = current[offset - 1] + 1
+                if cost > over:
+                    cost = over
+
+            current[offset] = cost
+            if cost < row_min:
+                row_min = cost
+
+        if row_min > max_distance:
+            return None
+
+        previous = current
+
+    distance = previous[width - len(first_string) + max_distance]
+    return distance if distance <= max_distance else None
+
+
+@profile_helper
+def bit_parallel_distance(first_string: str, second_string: str, max_distance: Optional[int]) -> Optional[int]:
+    """
+    Run Myers' bit-parallel algorithm with the shorter string as the pattern.
+    """
+    if len(first_string) > len(second_string):
+        first_string, second_string = second_string, first_string
+
+    pattern_length = len(first_string)
+    if pattern_length == 0:
+        distance = len(second_string)
+        return distance if max_distance is None or distance <= max_distance else None
+
+    # The bits of the positions of each character in the pattern.
+    pattern_masks: Dict[str, int] = {}
+    for index, char in enumerate(first_string):
+        pattern_masks[char] = pattern_masks.get(char, 0) | (1 << index)
+
+    all_bits = (1 << pattern_length) - 1
+    last_bit = 1 << (pattern_length - 1)
+    positive_vertical = all_bits
+    negative_vertical = 0
+    distance = pattern_length
+    remaining = len(second_string)
+
+    for char in second_string:
+        equal = pattern_masks.get(char, 0)
+        crossed_vertical = equal | negative_vertical
+        crossed_horizontal = (((equal & positive_vertical) + positive_vertical) ^ positive_vertical) | equal
+
+        positive_horizontal = negative_vertical | (~(crossed_horizontal | positive_vertical) & all_bits)
+        negative_horizontal = positive_vertical & crossed_horizontal
+
+        if positive_horizontal & last_bit:
+            distance += 1
+        elif negative_horizontal & last_bit:
+            distance -= 1
+
+        # The top row of the table counts up by one per column, so a +1 difference is shifted in.
+        positive_horizontal = ((positive_horizontal << 1) | 1) & all_bits
+        negative_horizontal = (negative_horizontal << 1) & all_bits
+
+        positive_vertical = negative_horizontal | (~(crossed_vertical | positive_horizontal) & all_bits)
+        negative_vertical = positive_horizontal & crossed_vertical
+
+        # The distance can drop by at most one per column left.
+        remaining -= 1
+        if max_distance is not None and distance - remaining > max_distance:
+            return None
+
+    return distance if max_distance is None or distance <= max_distance else None
+
+
+# -- Main ---------------------------------------------------------------------
+
+if __name__ == "__main__":
+    print(f"kitten, sitting, k = 3 should be 3: {bounded_edit_distance('kitten', 'sitting', 3)}")
+    print(f"kitten, sitting, k = 2 should be None: {bounded_edit_distance('kitten', 'sitting', 2)}")
+    print(f"pale, ple, k = 1 should be 1: {bounded_edit_distance('pale', 'ple', 1)}")
+    print(f"pale, bake, k = 1 should be None: {bounded_edit_distance('pale', 'bake', 1)}")
+
+    print(f"\npale, bale should be True: {one_away_edit_distance('pale', 'bale')}")
+    print(f"pale, bake should be False: {one_away_edit_distance('pale', 'bake')}")
+
+    print(f"\nBanded kitten, sitting, k = 3 should be 3: {bounded_edit_distance_banded('kitten', 'sitting', 3)}")
+    print(f"Bit-parallel kitten, sitting should be 3: {bounded_edit_distance_bit_parallel('kitten', 'sitting')}")
+    print(f"Bit-parallel Saturday, Sunday, k = 2 should be None: "
+          f"{bounded_edit_distance_bit_parallel('Saturday', 'Sunday', 2)}")
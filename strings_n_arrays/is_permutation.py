@@ -4,7 +4,30 @@ Is Permutation: Given two strings_n_arrays, write a method to decide if one is a
 Author: Fuzzy Carter
 """
 
+import mmap
+import os
+import sys
+from array import array
+from collections import Counter
+from itertools import zip_longest
+from typing import Hashable, Iterable, Iterator, List, MutableMapping, Optional
+
 from function_timer import function_timer
+from string_helpers import KeyedIndex
+
+LATIN_1_SIZE = 256
+BMP_SIZE = 65536
+
+# The default number of bytes read from each file per step of is_permutation_files.
+FILE_CHUNK_SIZE = 1 << 20
+
+# The UTF-32 encoding whose 4 byte units read back as the code points when loaded into an array("I").
+UTF_32_NATIVE = "utf-32-le" if sys.byteorder == "little" else "utf-32-be"
+
+# Up to this many distinct characters, counting each one with str.count() in C beats counting the string in Python,
+# as long as each character repeats often enough on average to pay for the calls to str.count().
+COUNT_METHOD_MAX_ALPHABET = 256
+COUNT_METHOD_MIN_REPEATS = 4
 
 
 @function_timer
@@ -12,6 +35,9 @@ def is_permutation_ordinal_sum(s1: str, s2: str) -> bool:
     """
     Check if is permutation by comparing the sum of the ordinal values of each character in the string.
 
+    Different strings can have the same sum, "ad" and "bc" for example, so this can return True for strings that are
+    not permutations. Use is_permutation_code_point_count for a correct O(n) check.
+
     Time Complexity: O(n)
     Space Complexity: O(1)
 
@@ -38,6 +64,9 @@ def is_permutation_string_minus_string(s1: str, s2: str) -> bool:
     """
     Check if is permutation by subtracting one string from the other.
 
+    This has the same collisions as is_permutation_ordinal_sum, so it can return True for strings that are not
+    permutations.
+
     Time Complexity: O(n)
     Space Complexity: O(1)
 
@@ -102,7 +131,255 @@ def is_permutation_character_count(s1: str, s2: str) -> bool:
 
     return True
 
+
+@function_timer
+def is_permutation_code_point_count(s1: str, s2: str) -> bool:
+    """
+    Check if is permutation by counting code points, after cheap checks that reject most mismatches early.
+
+    The sums of the code points are compared first. Unlike is_permutation_ordinal_sum this is only a filter, the sums
+    are computed in C from the UTF-32 encoding of each string, and strings that pass it are counted exactly. Strings
+    with a small alphabet for their length are counted one character at a time with str.count(), which runs in C.
+    Otherwise the code points are counted into a table indexed by code point, a list for Latin-1 and a compact
+    array("i") up to the end of the Basic Multilingual Plane, or a dictionary past it, so any Unicode string works.
+
+    Time Complexity: O(n)
+    Space Complexity: O(n), for the UTF-32 copy of each string summed and a count table of up to 256 KB
+
+    :param s1: The first string to compare.
+    :param s2: The second string to compare.
+    :return: True if the strings_n_arrays are permutations of each other.
+    """
+
+    if len(s1) != len(s2):
+        return False
+
+    if code_point_sum(s1) != code_point_sum(s2):
+        return False
+
+    alphabet = set(s1)
+    if len(alphabet) <= min(COUNT_METHOD_MAX_ALPHABET, len(s1) // COUNT_METHOD_MIN_REPEATS):
+        return all(s1.count(char) == s2.count(char) for char in alphabet)
+
+    largest = max(ord(max(s1)), ord(max(s2)))
+    if largest < LATIN_1_SIZE:
+        return same_code_point_counts(s1, s2, [0] * (largest + 1))
+
+    if largest < BMP_SIZE:
+        return same_code_point_counts(s1, s2, array("i", bytes(4 * (largest + 1))))
+
+    return same_code_point_counts(s1, s2, dict.fromkeys(map(ord, alphabet), 0))
+
+
+@function_timer
+def is_permutation_stream(chunks1: Iterable[Iterable[Hashable]], chunks2: Iterable[Iterable[Hashable]],
+                          total_length: Optional[int] = None) -> bool:
+    """
+    Check if two streams are permutations of each other without holding either of them in memory.
+
+    Each chunk is counted as soon as it is read, so a chunk of text counts characters, a chunk of bytes counts byte
+    values and a list of lines counts lines. Only the counts and one chunk from each stream are held at a time. The
+    counting is done by Counter.update, which runs in C.
+
+    The streams are read in step, and a stream that runs out of chunks first is read as empty chunks, so the answer
+    does not depend on how either stream is split into chunks. When the total length of each stream is given the check
+    stops once the surplus of symbols read from one stream is more than what is left to read from the other, as the
+    remaining chunks can no longer balance the counts.
+
+    Time Complexity: O(n)
+    Space Complexity: O(k + c), where k is the number of distinct symbols and c is the chunk size
+
+    :param chunks1: The chunks of the first stream.
+    :param chunks2: The chunks of the second stream.
+    :param total_length: The number of symbols in each stream, if known.
+    :return: True if the streams are permutations of each other.
+    """
+    counts1 = Counter()
+    counts2 = Counter()
+    read1 = 0
+    read2 = 0
+
+    stream1 = iter(chunks1)
+    stream2 = iter(chunks2)
+    try:
+        for chunk1, chunk2 in zip_longest(stream1, stream2, fillvalue=()):
+            counts1.update(chunk1)
+            counts2.update(chunk2)
+            read1 += len(chunk1)
+            read2 += len(chunk2)
+
+            if total_length is not None and not counts_can_balance(counts1, counts2, total_length - read1,
+                                                                    total_length - read2):
+                return False
+    finally:
+        for stream in (stream1, stream2):
+            if hasattr(stream, "close"):
+                stream.close()
+
+    return read1 == read2 and counts1 == counts2
+
+
+@function_timer
+def is_permutation_files(path1: str, path2: str, chunk_size: int = FILE_CHUNK_SIZE, by_line: bool = False) -> bool:
+    """
+    Check if two files are permutations of each other, byte by byte or line by line, by memory mapping them and
+    streaming them through is_permutation_stream.
+
+    Files of different sizes are rejected before either is read when comparing bytes. Lines are compared without
+    their line endings, so a missing newline at the end of a file does not matter.
+
+    Time Complexity: O(n)
+    Space Complexity: O(k + c), where k is the number of distinct bytes or lines and c is the chunk size
+
+    :param path1: The path of the first file.
+    :param path2: The path of the second file.
+    :param chunk_size: The number of bytes read from each file per step.
+    :param by_line: Compare the files as multisets of lines instead of bytes.
+    :return: True if the files are permutations of each other.
+    """
+    if by_line:
+        return is_permutation_stream(mapped_line_chunks(path1, chunk_size), mapped_line_chunks(path2, chunk_size))
+
+    size = os.path.getsize(path1)
+    if size != os.path.getsize(path2):
+        return False
+
+    return is_permutation_stream(mapped_chunks(path1, chunk_size), mapped_chunks(path2, chunk_size), size)
+
+
+class PermutationIndex(KeyedIndex):
+    """
+    An index of strings bucketed by their multiset signature, so every string in a bucket is a permutation of every
+    other string in it.
+
+    Checking whether any stored string is a permutation of a query is one signature and one dictionary lookup, instead
+    of a pairwise comparison against every stored string.
+
+    Time Complexity: O(k log(k)) per insert or query, where k is the length of the string
+    Space Complexity: O(n), where n is the total length of the stored strings
+    """
+
+    def __init__(self, strings: Iterable[str] = ()):
+        super().__init__(permutation_signature, strings)
+
+    def has_permutation(self, string: str) -> bool:
+        """
+        Check if any stored string is a permutation of the given string.
+        """
+        return self.has_match(string)
+
+    def permutations_of(self, string: str) -> List[str]:
+        """
+        Get every stored string that is a permutation of the given string, in the order they were added.
+        """
+        return self.matches_of(string)
+
+
+@function_timer
+def group_permutations(strings: Iterable[str]) -> List[List[str]]:
+    """
+    Group a corpus of strings into sets of permutations of each other by bucketing them on their multiset signature.
+
+    Time Complexity: O(n log(k)), where n is the total length of the strings and k is the longest string
+    Space Complexity: O(n)
+
+    :param strings: The strings to group.
+    :return: Every group of two or more distinct strings that are permutations of each other.
+    """
+    return PermutationIndex(strings).groups()
+
+
+# -- Helper Functions ---------------------------------------------------------
+
+def code_point_sum(string: str) -> int:
+    """
+    Sum the code points of a string in C by reading its UTF-32 encoding as an array of unsigned ints.
+    """
+    return sum(array("I", string.encode(UTF_32_NATIVE, "surrogatepass")))
+
+
+def same_code_point_counts(s1: str, s2: str, counts: MutableMapping[int, int]) -> bool:
+    """
+    Check if two strings of the same length have the same count of every code point.
+
+    :param s1: The first string to compare.
+    :param s2: The second string to compare.
+    :param counts: Zeroed counts indexed by code point, a list or array covering every code point or a dictionary with
+        a key for every code point in s1.
+    :return: True if the strings_n_arrays are permutations of each other.
+    """
+    for code_point in map(ord, s1):
+        counts[code_point] += 1
+
+    try:
+        for code_point in map(ord, s2):
+            if not counts[code_point]:
+                return False
+            counts[code_point] -= 1
+    except KeyError:  # A code point of s2 that is not in s1.
+        return False
+
+    return True
+
+
+def counts_can_balance(counts1: Counter, counts2: Counter, remaining1: int, remaining2: int) -> bool:
+    """
+    Check if the symbols left to read from two streams could still even out their counts.
+
+    Every symbol the first stream has more of must still come from the second stream and the other way around, so the
+    surplus on each side cannot be more than what is left to read from the other stream.
+
+    :param counts1: The counts read from the first stream.
+    :param counts2: The counts read from the second stream.
+    :param remaining1: The number of symbols left in the first stream.
+    :param remaining2: The number of symbols left in the second stream.
+    :return: False if the streams can no longer be permutations of each other.
+    """
+    surplus1 = sum((counts1 - counts2).values())
+    surplus2 = sum((counts2 - counts1).values())
+
+    return surplus1 <= remaining2 and surplus2 <= remaining1
+
+
+def mapped_chunks(path: str, chunk_size: int) -> Iterator[bytes]:
+    """
+    Read a file in chunks of bytes through a memory map.
+    """
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            for start in range(0, len(mapped), chunk_size):
+                yield mapped[start:start + chunk_size]
+
+
+def mapped_line_chunks(path: str, chunk_size: int) -> Iterator[List[bytes]]:
+    """
+    Read a file in chunks of whole lines, without their line endings, through a memory map.
+    """
+    pending = b""
+
+    for chunk in mapped_chunks(path, chunk_size):
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        yield [line.rstrip(b"\r") for line in lines]
+
+    if pending:
+        yield [pending.rstrip(b"\r")]
+
+
+def permutation_signature(string: str) -> str:
+    """
+    Get the canonical multiset signature of a string, its characters in sorted order. Two strings are permutations of
+    each other exactly when their signatures are equal.
+    """
+    return "".join(sorted(string))
+
+
 if __name__ == "__main__":
+    import tempfile
+
     string_permutation_true_1 = "abcdefghi"
     string_permutation_true_2 = "ihgfedcba"
 
@@ -120,3 +397,33 @@ if __name__ == "__main__":
 
     print(is_permutation_character_count(string_permutation_true_1, string_permutation_true_2))
     print(is_permutation_character_count(string_permutation_false_1, string_permutation_false_2))
+
+    print(is_permutation_code_point_count(string_permutation_true_1, string_permutation_true_2))
+    print(is_permutation_code_point_count(string_permutation_false_1, string_permutation_false_2))
+    print(is_permutation_code_point_count("ad", "bc"))
+    print(is_permutation_code_point_count("日本語 café", "éfac 語本日"))
+
+    words = ["listen", "silent", "enlist", "google", "gogole", "cat", "act", "tac", "dog", "listen"]
+    index = PermutationIndex(words)
+    print(index.permutations_of("tinsel"))
+    print(index.has_permutation("god"))
+    print(index.has_permutation("bird"))
+    print(group_permutations(words))
+
+    print(is_permutation_stream(["abc", "def"], ["fed", "cba"]))
+    print(is_permutation_stream(["aaa", "bbb"], ["ccc", "aaa"], total_length=6))
+    print(is_permutation_stream([["error", "info"], ["warn"]], [["warn", "error"], ["info"]]))
+    print(is_permutation_stream(["abc", "def"], ["abcdef"]))
+
+    with tempfile.TemporaryDirectory() as directory:
+        def write_file(name: str, contents: bytes) -> str:
+            path = os.path.join(directory, name)
+            with open(path, "wb") as file:
+                file.write(contents)
+            return path
+
+        print(is_permutation_files(write_file("crlf", b"a\r\nb\r\n"), write_file("lf", b"b\na\n"), chunk_size=4,
+                                   by_line=True))
+        print(is_permutation_files(write_file("newline", b"aa\nbb\n"), write_file("no_newline", b"bb\naa"),
+                                   chunk_size=3, by_line=True))
+        print(is_permutation_files(write_file("bytes", b"abcdef"), write_file("reversed", b"fedcba"), chunk_size=4))
@@ -11,7 +11,29 @@ pale, bake -> false
 Author: Fuzzy Carter
 """
 
-from function_timer import function_timer
+import os
+import sys
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import AnyStr, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from function_timer import function_timer, profile_helper
+
+# The serialized index starts with this, followed by the sizes of its sections.
+INDEX_MAGIC = b"ONEAWAY1"
+INDEX_HEADER_SIZE = len(INDEX_MAGIC) + 4 * 8
+NO_ENTRY = -1
+
+# Pairs are sent to the worker processes in chunks this size, with this many chunks in flight per process.
+BATCH_CHUNK_SIZE = 8192
+BATCH_CHUNKS_PER_PROCESS = 2
+
+# one_away_slices compares slices that start this long and double while they match, up to the maximum, so the work in
+# C stays linear and no more than the maximum is copied at once.
+SLICE_START = 64
+SLICE_MAX = 1 << 16
 
 
 @function_timer
@@ -34,9 +56,9 @@ def one_away_cleaner(first_string: str, second_string: str) -> bool:
 
     if len(first_string) == len(second_string):
         return one_replace_away(first_string, second_string)
-    elif len(first_string) + 1 > len(second_string):
+    elif len(first_string) + 1 == len(second_string):
         return one_insert_away(first_string, second_string)
-    elif len(first_string) - 1 < len(second_string):
+    elif len(first_string) - 1 == len(second_string):
         return one_insert_away(second_string, first_string)
 
     return False
@@ -89,8 +111,246 @@ def one_away_single_loop(first_string: str, second_string: str) -> bool:
     return True
 
 
+@function_timer
+def one_away_slices(first_string: AnyStr, second_string: AnyStr) -> bool:
+    """
+    Check if is one away by finding the first mismatch and comparing everything after it in one go, so no characters
+    are compared one at a time in Python.
+
+    The first mismatch is found by comparing slices that double in size while they match, then by binary search inside
+    the slice that does not. Both run in C. After it, a replacement leaves the rest of both strings equal and an
+    insert leaves the rest of the shorter string equal to the rest of the longer one past the mismatch, so comparing
+    what is left settles it. For long, nearly identical strings such as document revisions this is a few memcmp calls
+    instead of a Python loop over every character. Byte strings work the same way.
+
+    Python cannot compare part of a string without copying it, so this is not free of allocations. Slices are capped at
+    SLICE_MAX characters instead, which keeps the memory used constant.
+
+    Time Complexity: O(n) comparisons in C, with O(log(n) + n / SLICE_MAX) steps in Python
+    Space Complexity: O(1), apart from slices of at most SLICE_MAX characters
+
+    :param first_string: The first string to compare.
+    :param second_string: The second string to compare.
+    :return: True if the strings are one edit away from being equal.
+    """
+    return slices_one_away(first_string, second_string)
+
+
+class OneAwayIndex:
+    """
+    An index of words for finding every stored word within one edit of a query, using symmetric delete neighbourhoods.
+
+    Each word is filed under itself and every string made by deleting one of its characters. Two words are one edit
+    apart only if their neighbourhoods meet: a replacement deletes to the same string on both sides, and an insert
+    leaves the shorter word as a delete of the longer one. A query looks up its own neighbourhood of n + 1 strings and
+    checks the few words it finds, instead of comparing against the whole dictionary. Transpositions also meet, so
+    every candidate is checked with one_replace_away or one_insert_away.
+
+    The words filed under each neighbourhood string are a linked list in two array("i") columns, so the dictionary
+    holds one int per string and there are no per-string lists. The serialized form stores these arrays as they are,
+    so loading is mostly array.frombytes and one dictionary built in C.
+
+    Words are stored one per line when serialized, so they cannot contain a newline.
+
+    Time Complexity: O(k^2) per insert and O(k^2 + c) per query, where k is the length of the word and c is the number
+    of candidates found
+    Space Complexity: O(n * k), where n is the number of words
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        self.words: List[str] = []
+        self.word_ids: Dict[str, int] = {}
+        # The first entry for each neighbourhood string, and the word and next entry for every entry.
+        self.heads: Dict[str, int] = {}
+        self.entry_words = array("i")
+        self.entry_next = array("i")
+        self.update(words)
+
+    def add(self, word: str) -> None:
+        """
+        Add a word to the index. Adding a word already in the index does nothing.
+        """
+        if word in self.word_ids:
+            return
+        if "\n" in word:
+            raise ValueError("Words in a OneAwayIndex cannot contain a newline.")
+
+        word_id = len(self.words)
+        self.words.append(word)
+        self.word_ids[word] = word_id
+
+        heads = self.heads
+        for key in delete_neighbourhood(word):
+            self.entry_words.append(word_id)
+            self.entry_next.append(heads.get(key, NO_ENTRY))
+            heads[key] = len(self.entry_words) - 1
+
+    def update(self, words: Iterable[str]) -> None:
+        """
+        Add every word to the index.
+        """
+        for word in words:
+            self.add(word)
+
+    def within_one_edit(self, query: str) -> List[str]:
+        """
+        Get every stored word that is one edit (or zero edits) away from the query, in the order they were added.
+        """
+        heads = self.heads
+        entry_words = self.entry_words
+        entry_next = self.entry_next
+
+        candidates = set()
+        for key in delete_neighbourhood(query):
+            entry = heads.get(key, NO_ENTRY)
+            while entry != NO_ENTRY:
+                candidates.add(entry_words[entry])
+                entry = entry_next[entry]
+
+        return [self.words[word_id] for word_id in sorted(candidates)
+                if one_edit_apart(query, self.words[word_id])]
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize the index: a header with the section sizes, the words and neighbourhood strings as newline separated
+        UTF-8, then the head, word and next arrays as little-endian 32 bit ints.
+        """
+        words = "\n".join(self.words).encode("utf-8")
+        keys = "\n".join(self.heads).encode("utf-8")
+        heads = little_endian(array("i", self.heads.values()))
+
+        header = b"".join(count.to_bytes(8, "little") for count in
+                          (len(self.words), len(words), len(self.heads), len(keys)))
+
+        return b"".join((INDEX_MAGIC, header, words, keys, heads,
+                         little_endian(self.entry_words), little_endian(self.entry_next)))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "OneAwayIndex":
+        """
+        Load an index serialized by to_bytes.
+        """
+        if data[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+            raise ValueError("Data is not a serialized OneAwayIndex.")
+
+        word_count, words_size, key_count, keys_size = (int.from_bytes(data[offset:offset + 8], "little")
+                                                        for offset in range(len(INDEX_MAGIC), INDEX_HEADER_SIZE, 8))
+
+        view = memoryview(data)
+        offset = INDEX_HEADER_SIZE
+        words = split_lines(bytes(view[offset:offset + words_size]), word_count)
+        offset += words_size
+        keys = split_lines(bytes(view[offset:offset + keys_size]), key_count)
+        offset += keys_size
+
+        heads = read_int_array(view[offset:offset + 4 * key_count])
+        offset += 4 * key_count
+        entry_count = (len(view) - offset) // 8
+        entry_words = read_int_array(view[offset:offset + 4 * entry_count])
+        entry_next = read_int_array(view[offset + 4 * entry_count:offset + 8 * entry_count])
+
+        index = cls()
+        index.words = words
+        index.word_ids = dict(zip(words, range(word_count)))
+        index.heads = dict(zip(keys, heads))
+        index.entry_words = entry_words
+        index.entry_next = entry_next
+
+        return index
+
+    def save(self, path: str) -> None:
+        """
+        Write the serialized index to a file.
+        """
+        with open(path, "wb") as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "OneAwayIndex":
+        """
+        Read an index written by save.
+        """
+        with open(path, "rb") as file:
+            return cls.from_bytes(file.read())
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.word_ids
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+
+@function_timer
+def one_away_matches(words: Iterable[str], queries: Iterable[str]) -> List[List[str]]:
+    """
+    Find every word within one edit of each query by indexing the words once, instead of comparing every query with
+    every word.
+
+    Time Complexity: O((n + q) * k^2 + c), where n is the number of words, q is the number of queries, k is the longest
+    string and c is the number of candidates found
+    Space Complexity: O(n * k)
+
+    :param words: The dictionary to search.
+    :param queries: The strings to look up.
+    :return: The words within one edit of each query.
+    """
+    index = OneAwayIndex(words)
+    return [index.within_one_edit(query) for query in queries]
+
+
+@function_timer
+def one_away_batch(pairs: Iterable[Tuple[str, str]], processes: Optional[int] = None,
+                   chunk_size: int = BATCH_CHUNK_SIZE) -> Iterator[bool]:
+    """
+    Check a stream of string pairs for being one edit away, spreading the work over a pool of processes and yielding
+    the results in the order of the pairs.
+
+    Each chunk of pairs is prefiltered before it is sent to a worker. Pairs that are equal are one away and pairs whose
+    lengths differ by more than one are not, both found with C comparisons. Only the rest are pickled to a worker,
+    which checks them as one_away_slices does. Workers send their results back as bytes, one per pair.
+
+    A bounded number of chunks is in flight at once, so the pairs are read lazily and memory does not grow with the
+    size of the stream. Throughput grows with the number of processes until reading the pairs and the prefilter, which
+    run in this process, become the bottleneck.
+
+    Time Complexity: O(n / p) over the total length of the pairs, where p is the number of processes
+    Space Complexity: O(p * c), where c is the chunk size
+
+    :param pairs: The pairs of strings to check.
+    :param processes: The number of worker processes, the CPU count if None. With 1 no pool is started.
+    :param chunk_size: The number of pairs in each chunk.
+    :return: True for each pair that is one edit (or zero edits) away.
+    """
+    pairs = iter(pairs)
+    chunks = iter(lambda: list(islice(pairs, chunk_size)), [])
+
+    if processes == 1:
+        for chunk in chunks:
+            decided, remaining = prefilter_pairs(chunk)
+            yield from merge_decisions(decided, one_away_chunk(remaining))
+        return
+
+    processes = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(processes) as pool:
+        in_flight = deque()
+        max_in_flight = BATCH_CHUNKS_PER_PROCESS * processes
+
+        for chunk in chunks:
+            decided, remaining = prefilter_pairs(chunk)
+            in_flight.append((decided, pool.submit(one_away_chunk, remaining)))
+
+            if len(in_flight) >= max_in_flight:
+                decided, results = in_flight.popleft()
+                yield from merge_decisions(decided, results.result())
+
+        while in_flight:
+            decided, results = in_flight.popleft()
+            yield from merge_decisions(decided, results.result())
+
+
 # -- Helper Functions ---------------------------------------------------------
 
+@profile_helper
 def one_replace_away(first_string: str, second_string: str) -> bool:
     """
     Check if is one replace away by iterating through the strings_n_arrays and comparing the characters. If the characters are
@@ -113,6 +373,7 @@ def one_replace_away(first_string: str, second_string: str) -> bool:
     return True
 
 
+@profile_helper
 def one_insert_away(first_string: str, second_string: str) -> bool:
     """
     Check if is one insert away by iterating through the strings_n_arrays and comparing the characters. If the characters are
@@ -139,6 +400,161 @@ def one_insert_away(first_string: str, second_string: str) -> bool:
     return True
 
 
+def delete_neighbourhood(word: str) -> set:
+    """
+    Get the word and every distinct string made by deleting one of its characters.
+    """
+    neighbourhood = {word[:index] + word[index + 1:] for index in range(len(word))}
+    neighbourhood.add(word)
+    return neighbourhood
+
+
+def one_edit_apart(first_string: str, second_string: str) -> bool:
+    """
+    Check two strings whose lengths differ by at most one with one_replace_away or one_insert_away.
+    """
+    if len(first_string) == len(second_string):
+        return one_replace_away(first_string, second_string)
+    if len(first_string) < len(second_string):
+        return one_insert_away(first_string, second_string)
+
+    return one_insert_away(second_string, first_string)
+
+
+def little_endian(values: array) -> bytes:
+    """
+    Get the bytes of an array in little-endian order.
+    """
+    if sys.byteorder == "little":
+        return values.tobytes()
+
+    swapped = array(values.typecode, values)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def read_int_array(data: memoryview) -> array:
+    """
+    Read little-endian 32 bit ints written by little_endian.
+    """
+    values = array("i")
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+
+    return values
+
+
+def split_lines(data: bytes, count: int) -> List[str]:
+    """
+    Split newline separated UTF-8 back into its strings. No strings and one empty string both serialize to nothing, so
+    the count tells them apart.
+    """
+    return data.decode("utf-8").split("\n") if count else []
+
+
+def prefilter_pairs(pairs: List[Tuple[str, str]]) -> Tuple[List[Optional[bool]], List[Tuple[str, str]]]:
+    """
+    Decide the pairs that are equal or differ in length by more than one, and collect the rest to check.
+
+    :return: The result for each pair, None where it still has to be checked, and the pairs left to check.
+    """
+    decided = []
+    remaining = []
+
+    for first_string, second_string in pairs:
+        if first_string == second_string:
+            decided.append(True)
+        elif not -1 <= len(first_string) - len(second_string) <= 1:
+            decided.append(False)
+        else:
+            decided.append(None)
+            remaining.append((first_string, second_string))
+
+    return decided, remaining
+
+
+def merge_decisions(decided: List[Optional[bool]], results: bytes) -> Iterator[bool]:
+    """
+    Fill in the undecided pairs of a chunk with the results from a worker, in order.
+    """
+    checked = iter(results)
+    for decision in decided:
+        yield bool(next(checked)) if decision is None else decision
+
+
+def one_away_chunk(pairs: List[Tuple[str, str]]) -> bytes:
+    """
+    Check a chunk of pairs in a worker process with slices_one_away, returning one byte per pair.
+    """
+    return bytes(map(slices_one_away, *zip(*pairs))) if pairs else b""
+
+
+def slices_one_away(first_string: AnyStr, second_string: AnyStr) -> bool:
+    """
+    Check if is one away with slice comparisons, the core of one_away_slices without the timer.
+    """
+    if len(first_string) > len(second_string):
+        first_string, second_string = second_string, first_string
+
+    if len(second_string) - len(first_string) > 1:
+        return False
+
+    mismatch = common_prefix_length(first_string, second_string)
+    if mismatch == len(first_string):
+        return True
+
+    if len(first_string) == len(second_string):
+        return ranges_equal(first_string, mismatch + 1, second_string, mismatch + 1, len(first_string) - mismatch - 1)
+
+    return ranges_equal(first_string, mismatch, second_string, mismatch + 1, len(first_string) - mismatch)
+
+
+def common_prefix_length(first_string: AnyStr, second_string: AnyStr) -> int:
+    """
+    Find the length of the prefix two strings share, comparing slices in C rather than characters in Python.
+
+    Slices double in size while they match, so the slice that holds the mismatch is at most twice what matched before
+    it, and a binary search inside that slice finds the mismatch.
+    """
+    length = min(len(first_string), len(second_string))
+    index = 0
+    step = SLICE_START
+
+    while index < length:
+        stop = min(index + step, length)
+        if first_string[index:stop] != second_string[index:stop]:
+            break
+
+        index = stop
+        step = min(2 * step, SLICE_MAX)
+    else:
+        return length
+
+    low, high = index, stop - 1
+    while low < high:
+        middle = (low + high + 1) // 2
+        if first_string[low:middle] == second_string[low:middle]:
+            low = middle
+        else:
+            high = middle - 1
+
+    return low
+
+
+def ranges_equal(first_string: AnyStr, first: int, second_string: AnyStr, second: int, length: int) -> bool:
+    """
+    Compare ranges of two strings in slices of at most SLICE_MAX characters.
+    """
+    for offset in range(0, length, SLICE_MAX):
+        size = min(SLICE_MAX, length - offset)
+        if (first_string[first + offset:first + offset + size] !=
+                second_string[second + offset:second + offset + size]):
+            return False
+
+    return True
+
+
 if __name__ == "__main__":
     one_away_true1 = "pale"
     one_away_true2 = "pales"
@@ -161,6 +577,8 @@ if __name__ == "__main__":
           f"{one_away_cleaner(one_away_true1, one_away_small_false)}")
     print(f"{one_away_false} is one away from {one_away_large_false} should be false: "
           f"{one_away_cleaner(one_away_true1, one_away_large_false)}")
+    print(f"{one_away_true1 + 'xyz'} is one away from {one_away_true1} should be false: "
+          f"{one_away_cleaner(one_away_true1 + 'xyz', one_away_true1)}")
 
     print(f"\none_away_single_loop Tests:")
     print(f"{one_away_true1} is one away from {one_away_true2} should be true: "
@@ -174,3 +592,33 @@ if __name__ == "__main__":
           f"{one_away_single_loop(one_away_true1, one_away_small_false)}")
     print(f"{one_away_false} is one away from {one_away_large_false} should be false: "
           f"{one_away_single_loop(one_away_true1, one_away_large_false)}")
+
+    print(f"\none_away_slices Tests:")
+    print(f"{one_away_true1} is one away from {one_away_true2} should be true: "
+          f"{one_away_slices(one_away_true1, one_away_true2)}")
+    print(f"{one_away_true1} is one away from {one_away_true3} should be true: "
+          f"{one_away_slices(one_away_true1, one_away_true3)}")
+    print(f"{one_away_true1} is one away from {one_away_false} should be false: "
+          f"{one_away_slices(one_away_true1, one_away_false)}")
+
+    revision = "lorem ipsum " * 100000
+    print(f"Revisions one replacement apart should be true: "
+          f"{one_away_slices(revision, revision[:600000] + 'X' + revision[600001:])}")
+    print(f"Byte revisions one insert apart should be true: "
+          f"{one_away_slices(revision.encode(), revision[:600000].encode() + b'X' + revision[600000:].encode())}")
+
+    print(f"\nOneAwayIndex Tests:")
+    index = OneAwayIndex(["pale", "bale", "ale", "pales", "bake", "pla", "lape"])
+    print(f"Words one away from {one_away_true1} should be [pale, bale, ale, pales]: "
+          f"{index.within_one_edit(one_away_true1)}")
+    print(f"Words one away from {one_away_small_false} should be []: {index.within_one_edit(one_away_small_false)}")
+
+    index.add("palest")
+    loaded = OneAwayIndex.from_bytes(index.to_bytes())
+    print(f"Words one away from {one_away_true2} after a round trip should be [pale, pales, palest]: "
+          f"{loaded.within_one_edit(one_away_true2)}")
+
+    print(f"\none_away_batch Tests:")
+    pairs = [(one_away_true1, one_away_true2), (one_away_true1, one_away_true3), (one_away_true1, one_away_false),
+             (one_away_true1, one_away_large_false), (one_away_true1, one_away_true1)]
+    print(f"Pairs should be [True, True, False, False, True]: {list(one_away_batch(pairs, processes=2))}")
@@ -12,9 +12,35 @@ Output: True (permutations: "taco cat", "atco cta", etc.)
 Author: Fuzzy Carter
 """
 
-from string import ascii_lowercase
-from typing import Dict
-from function_timer import function_timer
+import threading
+import unicodedata
+from collections import Counter, deque
+from functools import reduce
+from itertools import chain, compress
+from operator import xor
+from string import ascii_lowercase, ascii_uppercase
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+from function_timer import function_timer, profile_helper
+
+# Byte translation tables used to lowercase ASCII letters and delete every other byte in one pass.
+LOWERCASE_TABLE = bytes.maketrans(ascii_uppercase.encode(), ascii_lowercase.encode())
+BATCH_SEPARATOR = b"\xff"  # Never produced by encoding to ASCII, so it cannot appear inside a phrase.
+NON_LETTER_BYTES = bytes(byte for byte in range(256)
+                         if byte not in ascii_lowercase.encode() + ascii_uppercase.encode() + BATCH_SEPARATOR)
+
+# The only character outside ASCII that str.lower() turns into an ASCII letter is the Kelvin sign, so the batch folds it
+# before encoding to count the same letters as the other solutions.
+ASCII_LETTER_FOLDS = str.maketrans({"\u212a": "k"})
+
+# The parity bit of each lowercase letter, indexed by byte value, so a phrase's bit vector is an XOR-reduce of lookups.
+LETTER_BITS = [1 << (byte - ord("a")) if chr(byte) in ascii_lowercase else 0 for byte in range(256)]
+
+# Maps a count to 1 if it is odd, in C.
+is_odd = (1).__and__
+
+# LetterAlphabet folds these code points up front, which covers Latin-1 and Latin Extended-A and B. Anything else is
+# folded the first time it is seen and cached.
+PRECOMPUTED_FOLD_RANGE = 0x250
 
 
 @function_timer
@@ -96,8 +122,314 @@ def is_palindrome_permutation_bit_vector(phrase: str) -> bool:
     return check_max_one_bit_set(bit_vector)
 
 
+@function_timer
+def is_palindrome_permutation_batch(phrases: Iterable[str]) -> List[bool]:
+    """
+    Check a whole batch of phrases at once.
+
+    The phrases are encoded and joined into one buffer, which is lowercased with the non-letters removed by a single
+    bytes.translate() call and split back into phrases. The bit vector of each phrase is then an XOR-reduce of a
+    lookup per letter, and the popcount of the bit vector tells if at most one letter appears an odd number of times.
+    Every per character step runs in C, which the benchmarks suite compares with looping
+    is_palindrome_permutation_bit_vector over the batch.
+
+    Like the other solutions only the characters that lower() turns into ASCII letters count, everything else is
+    ignored.
+
+    Time Complexity: O(n) over the total length of the batch
+    Space Complexity: O(n)
+
+    :param phrases: The potential palindrome permutations.
+    :return: True for each phrase that is a palindrome permutation.
+    """
+    get_bit = LETTER_BITS.__getitem__
+
+    return [reduce(xor, map(get_bit, letters), 0).bit_count() <= 1 for letters in encode_letters(phrases)]
+
+
+@function_timer
+def is_palindrome_permutation_unicode(phrase: str, alphabet: Optional["LetterAlphabet"] = None) -> bool:
+    """
+    Check if is palindrome permutation for any Unicode phrase, using the fold tables of a LetterAlphabet.
+
+    The characters of the phrase are counted with a Counter, which runs in C. Only the distinct characters that appear
+    an odd number of times are folded, with a single str.translate() call over the alphabet's cached fold table and no
+    lower() call per character, and the letters they fold to are counted again. The cost per character does not grow
+    with the number of distinct letters, so large alphabets such as CJK text stay close to the cost of ASCII.
+
+    Time Complexity: O(n)
+    Space Complexity: O(d), where d is the number of distinct characters in the phrase
+
+    :param phrase: The potential palindrome permutation.
+    :param alphabet: How letters are folded and matched, defaults to casefolding every Unicode letter.
+    :return: True if the string is a palindrome permutation.
+    """
+    return (alphabet or DEFAULT_ALPHABET).odd_letter_count(phrase) <= 1
+
+
+@function_timer
+def palindrome_permutation_windows(text: Iterable[str], window_length: int) -> Iterator[int]:
+    """
+    Find every window of window_length characters that is a palindrome permutation, reading the text as a stream.
+
+    The bit vector of the text up to each position is a prefix mask, built with toggle_bit one character at a time. The
+    bit vector of a window is the XOR of the prefix masks at its two ends, since the letters before the window cancel
+    out, so each window is checked in O(1) instead of rescanning its characters. Only the last window_length + 1 prefix
+    masks are kept. Windows count every character, but like the other solutions only letters affect the check.
+
+    Time Complexity: O(n)
+    Space Complexity: O(k), where k is the window length
+
+    :param text: The text to scan, a string or any iterable of strings such as a file read in chunks or lines.
+    :param window_length: The number of characters in each window.
+    :return: The start index of every window that is a palindrome permutation, in order.
+    """
+    if window_length <= 0:
+        raise ValueError("window_length must be positive.")
+
+    prefix_masks = deque([0], maxlen=window_length + 1)
+    bit_vector = 0
+
+    for end, char in enumerate(chain.from_iterable(text), start=1):
+        bit_vector = toggle_bit(bit_vector, letter_index(char))
+        prefix_masks.append(bit_vector)
+
+        if end >= window_length and check_max_one_bit_set(prefix_masks[0] ^ bit_vector):
+            yield end - window_length
+
+
+@function_timer
+def longest_palindrome_permutation_substring(text: Iterable[str]) -> Optional[Tuple[int, int]]:
+    """
+    Find the longest substring that is a palindrome permutation, reading the text as a stream.
+
+    A substring is a palindrome permutation when the prefix masks at its two ends are equal or differ in one letter
+    bit. A hash map holds the first position each prefix mask was seen, so for every position the longest qualifying
+    substring ending there is found by looking up the current mask and the current mask with each letter bit flipped.
+
+    Time Complexity: O(n * a), where a is the 26 letters of the alphabet
+    Space Complexity: O(min(n, 2^a))
+
+    :param text: The text to scan, a string or any iterable of strings such as a file read in chunks or lines.
+    :return: The start and end index of the longest substring, end exclusive, or None if the text is empty.
+    """
+    first_seen = {0: 0}
+    letter_bits = [1 << letter_index(letter) for letter in ascii_lowercase]
+    bit_vector = 0
+    longest = None
+
+    for end, char in enumerate(chain.from_iterable(text), start=1):
+        bit_vector = toggle_bit(bit_vector, letter_index(char))
+
+        start = first_seen.get(bit_vector, end)
+        for letter_bit in letter_bits:
+            start = min(start, first_seen.get(bit_vector ^ letter_bit, end))
+
+        if longest is None or end - start > longest[1] - longest[0]:
+            longest = (start, end)
+
+        first_seen.setdefault(bit_vector, end)
+
+    return longest
+
+
+class PalindromePermutationTracker:
+    """
+    Track whether a phrase being edited is a palindrome permutation, one character at a time.
+
+    The tracker keeps only the bit vector used by is_palindrome_permutation_bit_vector. Adding or removing a letter
+    flips its bit, replacing a letter flips two, and the phrase is a palindrome permutation while at most one bit is
+    set. The tracker does not store the phrase, so removing or replacing a character needs the character that was
+    there.
+
+    Only ASCII letters count unless a LetterAlphabet is given, in which case its bit vectors are used instead.
+
+    Time Complexity: O(1) per edit and per check
+    Space Complexity: O(1)
+    """
+
+    __slots__ = ("bit_vector", "alphabet")
+
+    def __init__(self, phrase: str = "", alphabet: Optional["LetterAlphabet"] = None):
+        self.bit_vector = 0
+        self.alphabet = alphabet
+        self.extend(phrase)
+
+    def append(self, char: str) -> None:
+        """
+        Add a character to the phrase. Non-letter characters are ignored.
+        """
+        self.bit_vector ^= self.char_bits(char)
+
+    def remove(self, char: str) -> None:
+        """
+        Remove a character from the phrase. Removing a letter flips the same bit as adding it.
+        """
+        self.bit_vector ^= self.char_bits(char)
+
+    def replace(self, old_char: str, new_char: str) -> None:
+        """
+        Replace a character in the phrase with another.
+        """
+        self.bit_vector ^= self.char_bits(old_char) ^ self.char_bits(new_char)
+
+    def char_bits(self, char: str) -> int:
+        """
+        Get the bits a character flips.
+        """
+        if self.alphabet is None:
+            return toggle_bit(0, letter_index(char))
+
+        return self.alphabet.bit_vector(char)
+
+    def extend(self, phrase: str) -> None:
+        """
+        Add every character of a phrase, such as a paste.
+        """
+        for char in phrase:
+            self.append(char)
+
+    def reset(self) -> None:
+        """
+        Clear the phrase.
+        """
+        self.bit_vector = 0
+
+    def is_palindrome_permutation(self) -> bool:
+        """
+        Check if the phrase as it is now is a palindrome permutation.
+        """
+        return check_max_one_bit_set(self.bit_vector)
+
+
+class FoldTable(dict):
+    """
+    A str.translate() table that folds each code point the first time it is looked up and caches the result.
+    """
+
+    def __init__(self, fold):
+        super().__init__()
+        self.fold = fold
+
+    def __missing__(self, code_point: int) -> Optional[str]:
+        folded = self[code_point] = self.fold(chr(code_point))
+        return folded
+
+
+class BitIndexTable(dict):
+    """
+    A table from folded letters to single bit masks, giving each new letter the next free bit so the bits stay dense.
+
+    Letters already in the table are read without locking. A new letter takes the lock, so two threads that meet new
+    letters at the same time cannot give them the same bit.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+
+    def __missing__(self, letter: str) -> int:
+        with self.lock:
+            bit = self.get(letter)
+            if bit is None:
+                bit = self[letter] = 1 << len(self)
+            return bit
+
+
+class LetterAlphabet:
+    """
+    A configurable definition of which characters are letters and which letters match, with the tables to apply it
+    precomputed and cached.
+
+    Letters are casefolded, so "A", "a" and "ａ" match and "ß" counts as "ss". Accents can be stripped so "é" matches
+    "e". Overrides fold chosen characters differently, such as {"I": "ı", "İ": "i"} for Turkish, and an override of ""
+    drops a character. Everything that does not fold to letters is ignored.
+
+    Build an alphabet once and reuse it, the tables grow as new characters are seen and are never rebuilt.
+    """
+
+    def __init__(self, strip_accents: bool = False, overrides: Optional[Mapping[str, str]] = None):
+        self.strip_accents = strip_accents
+        self.overrides = dict(overrides or {})
+        self.fold_table = FoldTable(self.fold_char)
+        self.bit_table = BitIndexTable()
+
+        for code_point in range(PRECOMPUTED_FOLD_RANGE):
+            self.fold_table[code_point] = self.fold_char(chr(code_point))
+
+    def fold_char(self, char: str) -> Optional[str]:
+        """
+        Fold a single character to the letters it counts as, or None if it is not a letter.
+        """
+        if char in self.overrides:
+            return self.overrides[char] or None
+
+        folded = char.casefold()
+        if self.strip_accents:
+            folded = "".join(part for part in unicodedata.normalize("NFD", folded) if not unicodedata.combining(part))
+
+        folded = "".join(part for part in folded if part.isalpha())
+
+        return folded or None
+
+    def fold(self, phrase: str) -> str:
+        """
+        Fold a phrase to just its letters.
+        """
+        return phrase.translate(self.fold_table)
+
+    def bit_vector(self, phrase: str) -> int:
+        """
+        Get the bit vector of a phrase, with the bit of every letter that appears an odd number of times set.
+
+        Each new letter takes the next bit, so this suits a few characters at a time, such as the edits of a
+        PalindromePermutationTracker. Use odd_letter_count for whole phrases.
+        """
+        return reduce(xor, map(self.bit_table.__getitem__, self.fold(phrase)), 0)
+
+    def odd_letter_count(self, phrase: str) -> int:
+        """
+        Count the letters that appear an odd number of times in a phrase.
+
+        The characters are counted first, and only the distinct characters that appear an odd number of times are
+        folded, since a character seen an even number of times adds an even count to every letter it folds to. Every
+        step runs in C.
+        """
+        counts = Counter(phrase)
+        odd_chars = "".join(compress(counts, map(is_odd, counts.values())))
+
+        return sum(map(is_odd, Counter(self.fold(odd_chars)).values()))
+
+
+DEFAULT_ALPHABET = LetterAlphabet()
+
+
 # -- Helper Functions ---------------------------------------------------------
 
+def letter_index(char: str) -> int:
+    """
+    Get the bit vector index of a character, its lowercase ordinal, or -1 for non-letter characters which toggle_bit
+    ignores.
+    """
+    char = char.lower()
+
+    return ord(char) if len(char) == 1 and char in ascii_lowercase else -1
+
+
+def encode_letters(phrases: Iterable[str]) -> List[bytes]:
+    """
+    Encode each phrase to its lowercase ASCII letters, translating the whole batch in one pass. The Kelvin sign is
+    folded to k first, as lower() does.
+    """
+    encoded = [(phrase if phrase.isascii() else phrase.translate(ASCII_LETTER_FOLDS)).encode("ascii", "ignore")
+               for phrase in phrases]
+    if not encoded:
+        return []
+
+    return BATCH_SEPARATOR.join(encoded).translate(LOWERCASE_TABLE, NON_LETTER_BYTES).split(BATCH_SEPARATOR)
+
+
+@profile_helper
 def get_char_frequency(phrase: str) -> dict:
     """
     Get the frequency of each character in the string.
@@ -118,6 +450,7 @@ def get_char_frequency(phrase: str) -> dict:
     return character_count
 
 
+@profile_helper
 def check_max_one_odd_character(character_count: Dict[str, int]) -> bool:
     """
     Check if there is more than one character that appears an odd number of times.
@@ -199,3 +532,36 @@ if __name__ == "__main__":
     print(f"Palindrome Permutation Odd False: {is_palindrome_permutation_bit_vector(palindrome_permutation_odd_false)}")
     print(f"Palindrome Permutation Non-Letter Odd False: " 
           f"{is_palindrome_permutation_bit_vector(palindrome_permutation_non_letter_odd_false)}")
+
+    print(f"\nThe following strings test is_palindrome_permutation_batch.")
+    batch = [phrase_even_true, palindrome_permutation_odd_true, palindrome_permutation_non_letter_odd_true,
+             palindrome_permutation_odd_false, palindrome_permutation_non_letter_odd_false]
+    print(f"Palindrome Permutation Batch, True True True False False: {is_palindrome_permutation_batch(batch)}")
+
+    print(f"\nThe following edits test PalindromePermutationTracker.")
+    tracker = PalindromePermutationTracker("Tact Co")
+    print(f"Tact Co, False: {tracker.is_palindrome_permutation()}")
+    tracker.append("a")
+    print(f"Tact Coa, True: {tracker.is_palindrome_permutation()}")
+    tracker.append("a")
+    print(f"Tact Coaa, False: {tracker.is_palindrome_permutation()}")
+    tracker.remove("a")
+    print(f"Tact Coa, True: {tracker.is_palindrome_permutation()}")
+    tracker.replace("T", "x")
+    print(f"xact Coa, False: {tracker.is_palindrome_permutation()}")
+
+    print(f"\nThe following strings test the sliding window searches.")
+    document = "xxtactcoayyracecarzz"
+    print(f"Windows of 7 in {document}, [0, 2, 11]: {list(palindrome_permutation_windows(document, 7))}")
+    start, end = longest_palindrome_permutation_substring(document)
+    print(f"Longest in {document}, xxtactcoayy: {document[start:end]}")
+    print(f"Windows of 7 in {document} read in chunks, [0, 2, 11]: "
+          f"{list(palindrome_permutation_windows(['xxtact', 'coayyrac', 'ecarzz'], 7))}")
+    print(f"Windows of 2 in abc, def read in chunks, []: {list(palindrome_permutation_windows(['abc', 'def'], 2))}")
+
+    print(f"\nThe following strings test is_palindrome_permutation_unicode.")
+    print(f"Ésope reste ici et se repose, False: {is_palindrome_permutation_unicode('Ésope reste ici et se repose')}")
+    print(f"Ésope reste ici et se repose, accents stripped, True: "
+          f"{is_palindrome_permutation_unicode('Ésope reste ici et se repose', LetterAlphabet(strip_accents=True))}")
+    print(f"Αννα, True: {is_palindrome_permutation_unicode('Αννα')}")
+    print(f"Maß sam, True: {is_palindrome_permutation_unicode('Maß sam')}")
@@ -0,0 +1,196 @@
+"""
+Rotation Index: Given a large collection of strings, such as circular DNA reads or ring buffer signatures, group the
+ones that are rotations of each other and look up the rotations of a new string without comparing it with every string.
+
+Every string has one rotation that comes first in lexicographic order, its minimal rotation. Two strings are rotations
+of each other exactly when their minimal rotations are equal, so the minimal rotation can key a hash index.
+
+Example:
+waterbottle, erbottlewat, bottlewater -> one group keyed by aterbottlew
+ACGT, GTAC, CGTA -> one group keyed by ACGT
+
+Solution 1: Minimal rotation by Lyndon factorization
+Solution 2: Hash index of minimal rotations
+
+Author: Fuzzy Carter
+"""
+
+from typing import Iterable, List
+
+from function_timer import function_timer, profile_helper
+from string_helpers import KeyedIndex
+
+# Comparing the rotations that start at each copy of the smallest character is quadratic in the worst case but runs in
+# C, so it is faster than the linear scan in Python while it compares up to this many characters.
+CANDIDATE_MAX_WORK = 1 << 18
+
+
+@function_timer
+def minimal_rotation(string: str) -> int:
+    """
+    Find where the lexicographically minimal rotation of the string starts.
+
+    This is Duval's Lyndon factorization run over the string doubled. The minimal rotation starts at the last Lyndon
+    word that begins in the first copy of the string, and the scan never moves backwards by more than it has matched,
+    so it is linear.
+
+    When the smallest character appears only a few times, the rotations starting at each copy of it are compared
+    instead. Each comparison is one slice comparison in C, which is faster than the scan for short strings and small
+    alphabets.
+
+    Time Complexity: O(n)
+    Space Complexity: O(n)
+
+    :param string: The string to rotate.
+    :return: The index the minimal rotation starts at, the first one if several rotations are equal.
+    """
+    return minimal_rotation_start(string)
+
+
+@function_timer
+def canonical_rotation(string: str) -> str:
+    """
+    Get the lexicographically minimal rotation of the string, which is the same for every rotation of it.
+
+    Time Complexity: O(n)
+    Space Complexity: O(n)
+
+    :param string: The string to rotate.
+    :return: The minimal rotation.
+    """
+    return rotation_key(string)
+
+
+class RotationIndex(KeyedIndex):
+    """
+    An index of strings bucketed by their minimal rotation, so every string in a bucket is a rotation of every other
+    string in it.
+
+    Checking whether any stored string is a rotation of a query is one minimal rotation and one dictionary lookup,
+    instead of an is_substring call against every stored string.
+
+    Time Complexity: O(k) per insert or query, where k is the length of the string
+    Space Complexity: O(n), where n is the total length of the stored strings
+    """
+
+    def __init__(self, strings: Iterable[str] = ()):
+        super().__init__(rotation_key, strings)
+
+    def has_rotation(self, string: str) -> bool:
+        """
+        Check if any stored string is a rotation of the given string.
+        """
+        return self.has_match(string)
+
+    def rotations_of(self, string: str) -> List[str]:
+        """
+        Get every stored string that is a rotation of the given string, in the order they were added.
+        """
+        return self.matches_of(string)
+
+
+@function_timer
+def group_rotations(strings: Iterable[str]) -> List[List[str]]:
+    """
+    Group a corpus of strings into sets of rotations of each other by bucketing them on their minimal rotation.
+
+    Time Complexity: O(n), where n is the total length of the strings
+    Space Complexity: O(n)
+
+    :param strings: The strings to group.
+    :return: Every group of two or more distinct strings that are rotations of each other.
+    """
+    return RotationIndex(strings).groups()
+
+
+# -- Helper Functions ---------------------------------------------------------
+
+def rotation_key(string: str) -> str:
+    """
+    Get the minimal rotation of a string to key the index with.
+    """
+    start = minimal_rotation_start(string)
+    return string[start:] + string[:start]
+
+
+@profile_helper
+def minimal_rotation_start(string: str) -> int:
+    """
+    Find where the minimal rotation starts, comparing the rotations at each copy of the smallest character when that
+    is cheap and running the Lyndon factorization otherwise.
+    """
+    length = len(string)
+    if length < 2:
+        return 0
+
+    smallest = min(string)
+    if string.count(smallest) * length <= CANDIDATE_MAX_WORK:
+        return candidate_minimal_rotation(string, smallest)
+
+    return lyndon_minimal_rotation(string)
+
+
+def candidate_minimal_rotation(string: str, smallest: str) -> int:
+    """
+    Compare the rotations starting at every copy of the smallest character, which is where the minimal one must start.
+    """
+    doubled = string + string
+    length = len(string)
+
+    best = start = string.find(smallest)
+    best_rotation = doubled[start:start + length]
+
+    start = string.find(smallest, start + 1)
+    while start != -1:
+        rotation = doubled[start:start + length]
+        if rotation < best_rotation:
+            best, best_rotation = start, rotation
+        start = string.find(smallest, start + 1)
+
+    return best
+
+
+def lyndon_minimal_rotation(string: str) -> int:
+    """
+    Find the minimal rotation with Duval's Lyndon factorization of the string doubled.
+    """
+    doubled = string + string
+    length = len(string)
+    doubled_length = 2 * length
+
+    start = 0
+    answer = 0
+    while start < length:
+        answer = start
+        ahead = start + 1
+        behind = start
+
+        # Extend the current run of repeated Lyndon words while the string keeps matching or growing past it.
+        while ahead < doubled_length and doubled[behind] <= doubled[ahead]:
+            if doubled[behind] < doubled[ahead]:
+                behind = start
+            else:
+                behind += 1
+            ahead += 1
+
+        # Skip over the whole Lyndon words found.
+        while start <= behind:
+            start += ahead - behind
+
+    return answer
+
+
+# -- Main ---------------------------------------------------------------------
+
+if __name__ == "__main__":
+    print(f"Minimal rotation of erbottlewat should be aterbottlew: {canonical_rotation('erbottlewat')}")
+    print(f"Minimal rotation of GTAC should start at 2: {minimal_rotation('GTAC')}")
+
+    index = RotationIndex(["waterbottle", "erbottlewat", "bottlewater", "ACGT", "GTAC", "CGTA", "ACTG"])
+    print(f"\nGroups should be [[waterbottle, erbottlewat, bottlewater], [ACGT, GTAC, CGTA]]: {index.groups()}")
+    print(f"Rotations of TACG should be [ACGT, GTAC, CGTA]: {index.rotations_of('TACG')}")
+    print(f"Has a rotation of waterbottles should be False: {index.has_rotation('waterbottles')}")
+
+    periodic = "ab" * 200000 + "a"
+    print(f"\nMinimal rotation of a 400001 character periodic string should start at 400000: "
+          f"{minimal_rotation(periodic)}")
@@ -0,0 +1,475 @@
+"""
+Run-Length Codec: Compress bytes by replacing each run of a repeated byte with its length and the byte, in a binary
+format that can always be decoded, and stream large files through it in chunks.
+
+Unlike the text format of string_compression, where "a2b1" cannot tell a count from a digit in the input, each run is
+written as its length as an unsigned LEB128 varint followed by the byte itself. A varint is 7 bits of the length per
+byte, low bits first, with the high bit set on every byte but the last, so runs of up to 127 take two bytes in total.
+
+Example:
+b"aaabccccc" -> b"\x03a\x01b\x05c"
+b"\x00" * 300 -> b"\xac\x02\x00"
+
+Solution 1: Encode or decode bytes in memory
+Solution 2: Stream file-like objects in chunks
+Solution 3: Pick between storing, run-length encoding and zlib from a sample
+
+Author: Fuzzy Carter
+"""
+
+import re
+import zlib
+from statistics import fmean, stdev
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from function_timer import function_timer, qualified_name, record_decision
+
+# The size of the chunks read from a stream and the most bytes of a single run written at once.
+STREAM_CHUNK_SIZE = 1 << 20
+
+# A run of each byte value, matched by the regex engine in C. Matching one literal repeated is a tight loop in the
+# engine, about 15x faster on long runs than a back reference such as rb"(.)\1*".
+RUN_PATTERNS = [re.compile(re.escape(bytes((symbol,))) + b"+") for symbol in range(256)]
+
+# compress_adaptive output starts with one of these to say how the rest is stored.
+STORED = 0
+RUN_LENGTH = 1
+ZLIB = 2
+METHOD_NAMES = {STORED: "stored", RUN_LENGTH: "run_length", ZLIB: "zlib"}
+
+# The zlib estimate compresses this many evenly spaced windows of this size. Inputs up to twice the total are compressed
+# whole, which is exact, costs about the same and is reused as the payload if zlib is picked.
+SAMPLE_WINDOWS = 8
+SAMPLE_WINDOW_SIZE = 1 << 16
+ZLIB_LEVEL = 6
+
+# The XOR of each byte with the next is zero where a byte repeats, so a run whose length needs a second varint byte,
+# one longer than 0x7F, shows up as at least this many zeros in a row.
+LONG_RUN_ZEROS = bytes(0x7F)
+
+# Run-length encoding is much faster than zlib in both directions, so it is picked unless zlib is predicted to be at
+# least this much smaller.
+ZLIB_MIN_ADVANTAGE = 0.8
+
+
+@function_timer
+def encode_runs(data: bytes) -> bytes:
+    """
+    Encode bytes as a varint length and the byte for each run.
+
+    Each run is matched with a regular expression for its byte, so the scan over the bytes runs in C and Python only
+    does work per run. That makes it fast for data with long runs, such as sensor logs.
+
+    Time Complexity: O(n + k), where n is the length of the data and k is the number of runs
+    Space Complexity: O(k)
+
+    :param data: The bytes to encode.
+    :return: The encoded runs.
+    """
+    encoder = RunLengthEncoder()
+    return encoder.encode(data) + encoder.flush()
+
+
+@function_timer
+def decode_runs(encoded: bytes) -> bytes:
+    """
+    Decode bytes encoded by encode_runs or RunLengthEncoder.
+
+    Time Complexity: O(n + k), where n is the length of the decoded data and k is the number of runs
+    Space Complexity: O(n)
+
+    :param encoded: The encoded runs.
+    :return: The decoded bytes.
+    :raises ValueError: If the encoding is truncated.
+    """
+    decoder = RunLengthDecoder()
+    decoded = decoder.decode(encoded)
+    decoder.flush()
+
+    return decoded
+
+
+@function_timer
+def compress_stream(source: BinaryIO, destination: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+    """
+    Encode everything read from a binary file-like object into another one, a chunk at a time.
+
+    Time Complexity: O(n + k), where n is the length of the data and k is the number of runs
+    Space Complexity: O(c), where c is the chunk size
+
+    :param source: The stream to read the bytes from.
+    :param destination: The stream to write the encoded runs to.
+    :param chunk_size: The number of bytes read from the source per step.
+    :return: The number of bytes written.
+    """
+    encoder = RunLengthEncoder()
+    written = 0
+
+    for chunk in iter(lambda: source.read(chunk_size), b""):
+        written += destination.write(encoder.encode(chunk))
+
+    return written + destination.write(encoder.flush())
+
+
+@function_timer
+def decompress_stream(source: BinaryIO, destination: BinaryIO, chunk_size: int = STREAM_CHUNK_SIZE) -> int:
+    """
+    Decode everything read from a binary file-like object into another one, a chunk at a time.
+
+    Long runs are written in pieces of at most chunk_size bytes, so a run of a billion zeros is never held in memory.
+
+    Time Complexity: O(n + k), where n is the length of the decoded data and k is the number of runs
+    Space Complexity: O(c), where c is the chunk size
+
+    :param source: The stream to read the encoded runs from.
+    :param destination: The stream to write the decoded bytes to.
+    :param chunk_size: The number of bytes read from the source per step.
+    :return: The number of bytes written.
+    :raises ValueError: If the encoding is truncated.
+    """
+    decoder = RunLengthDecoder()
+    written = 0
+
+    for chunk in iter(lambda: source.read(chunk_size), b""):
+        for piece in expand_runs(decoder.runs(chunk), chunk_size):
+            written += destination.write(piece)
+
+    decoder.flush()
+    return written
+
+
+@function_timer
+def compress_adaptive(data: bytes, windows: int = SAMPLE_WINDOWS, window_size: int = SAMPLE_WINDOW_SIZE) -> bytes:
+    """
+    Compress bytes with whichever of storing them as they are, run-length encoding or zlib is predicted to be smallest,
+    compressing them whole with only the method picked.
+
+    The sizes are predicted by estimate_compressed_sizes. Data small enough for zlib to have been run on all of it is
+    not compressed again, the payload from the estimate is reused. The choice, the predicted size and the size it
+    actually compressed to are recorded with record_decision, so snapshot_decisions() shows how often each method is
+    picked and how accurate the predictions are.
+
+    Time Complexity: O(n + s), where n is the length of the data and s is the size of the sample
+    Space Complexity: O(n)
+
+    :param data: The bytes to compress.
+    :param windows: The number of windows sampled.
+    :param window_size: The length of each window.
+    :return: A byte naming the method, followed by the data compressed with it.
+    """
+    estimates, payloads = estimate_sizes_and_payloads(data, windows, window_size)
+    run_length = estimates[RUN_LENGTH][0]
+    deflated = estimates[ZLIB][0]
+
+    method = STORED
+    if min(run_length, deflated) < len(data):
+        method = ZLIB if deflated < ZLIB_MIN_ADVANTAGE * run_length else RUN_LENGTH
+
+    if method in payloads:
+        payload = payloads[method]
+    elif method == RUN_LENGTH:
+        payload = encode_runs(data)
+    elif method == ZLIB:
+        payload = zlib.compress(data, ZLIB_LEVEL)
+    else:
+        payload = data
+
+    record_decision(qualified_name(compress_adaptive), METHOD_NAMES[method], estimates[method][0], len(payload))
+    return bytes((method,)) + payload
+
+
+@function_timer
+def decompress_adaptive(compressed: bytes) -> bytes:
+    """
+    Decompress bytes compressed by compress_adaptive.
+
+    Time Complexity: O(n), where n is the length of the decompressed data
+    Space Complexity: O(n)
+
+    :param compressed: The method byte followed by the compressed data.
+    :return: The decompressed bytes.
+    :raises ValueError: If the method byte is not one compress_adaptive writes.
+    """
+    method, payload = compressed[0], compressed[1:]
+
+    if method == RUN_LENGTH:
+        return decode_runs(payload)
+    if method == ZLIB:
+        return zlib.decompress(payload)
+    if method == STORED:
+        return payload
+
+    raise ValueError(f"Unknown compression method {method}.")
+
+
+def estimate_compressed_sizes(data: bytes, windows: int = SAMPLE_WINDOWS,
+                              window_size: int = SAMPLE_WINDOW_SIZE) -> Dict[int, Tuple[int, int]]:
+    """
+    Predict the size of the data stored, run-length encoded and compressed with zlib.
+
+    The run-length size is exact: it is counted from where the runs start by run_length_size, which finds them in C
+    without encoding anything, so it costs a small part of one pass over the data even when every byte is a run.
+
+    The zlib size is predicted by compressing a few windows spread evenly over the data and scaling up the ratio they
+    compress by, with a margin of two standard errors of the mean window ratio scaled to the whole data, so the size is
+    within the margin about 95% of the time when the windows are representative. Data up to twice the size of the
+    sample is compressed whole and its size is exact, with no margin.
+
+    Time Complexity: O(n + s), where n is the length of the data and s is windows * window_size
+    Space Complexity: O(n)
+
+    :param data: The bytes to predict the compressed sizes of.
+    :param windows: The number of windows sampled.
+    :param window_size: The length of each window.
+    :return: The predicted size and margin for each method, keyed by method.
+    """
+    return estimate_sizes_and_payloads(data, windows, window_size)[0]
+
+
+class RunLengthEncoder:
+    """
+    An incremental encoder that takes the data a chunk at a time, like zlib.compressobj.
+
+    The last run of each chunk may carry on into the next one, so it is held back until a different byte arrives or
+    the encoder is flushed.
+    """
+
+    __slots__ = ("symbol", "length")
+
+    def __init__(self):
+        self.symbol: Optional[int] = None
+        self.length = 0
+
+    def encode(self, chunk: bytes) -> bytes:
+        """
+        Encode a chunk, returning the runs it completes.
+        """
+        output = bytearray()
+        position = 0
+        size = len(chunk)
+
+        while position < size:
+            symbol = chunk[position]
+            end = RUN_PATTERNS[symbol].match(chunk, position).end()
+            length = end - position
+            position = end
+
+            if symbol == self.symbol:
+                self.length += length
+                continue
+
+            if self.symbol is not None:
+                append_run(output, self.symbol, self.length)
+
+            self.symbol = symbol
+            self.length = length
+
+        return bytes(output)
+
+    def flush(self) -> bytes:
+        """
+        Encode the run held back from the last chunk and reset the encoder.
+        """
+        output = bytearray()
+        if self.symbol is not None:
+            append_run(output, self.symbol, self.length)
+
+        self.symbol = None
+        self.length = 0
+
+        return bytes(output)
+
+
+class RunLengthDecoder:
+    """
+    An incremental decoder that takes the encoded runs a chunk at a time, like zlib.decompressobj.
+
+    A chunk can end partway through a varint or between a length and its byte, so the incomplete tail is kept and
+    decoded with the next chunk.
+    """
+
+    __slots__ = ("pending",)
+
+    def __init__(self):
+        self.pending = b""
+
+    def runs(self, chunk: bytes) -> List[Tuple[int, int]]:
+        """
+        Decode a chunk into the (byte, length) runs it completes.
+        """
+        data = self.pending + chunk if self.pending else chunk
+        runs = []
+        position = 0
+        size = len(data)
+
+        while position < size:
+            length, end = read_varint(data, position)
+            if end >= size:
+                break
+
+            runs.append((data[end], length))
+            position = end + 1
+
+        self.pending = data[position:]
+        return runs
+
+    def decode(self, chunk: bytes) -> bytes:
+        """
+        Decode a chunk into the bytes of the runs it completes.
+        """
+        return b"".join(bytes((symbol,)) * length for symbol, length in self.runs(chunk))
+
+    def flush(self) -> None:
+        """
+        Check that the encoding ended on a whole run and reset the decoder.
+
+        :raises ValueError: If there is a partial run left over.
+        """
+        pending, self.pending = self.pending, b""
+        if pending:
+            raise ValueError(f"Run-length encoding is truncated, {len(pending)} bytes of a run are left over.")
+
+
+# -- Helper Functions ---------------------------------------------------------
+
+def estimate_sizes_and_payloads(data: bytes, windows: int,
+                                window_size: int) -> Tuple[Dict[int, Tuple[int, int]], Dict[int, bytes]]:
+    """
+    Predict the compressed sizes like estimate_compressed_sizes, keeping any payload compressed whole along the way.
+
+    :return: The predicted size and margin for each method, and the payload of each method that compressed all of it.
+    """
+    size = len(data)
+    estimates = {STORED: (size, 0), RUN_LENGTH: (run_length_size(data), 0)}
+
+    if size <= 2 * windows * window_size or windows < 2:
+        deflated = zlib.compress(data, ZLIB_LEVEL)
+        estimates[ZLIB] = (len(deflated), 0)
+        return estimates, {ZLIB: deflated}
+
+    starts = [index * (size - window_size) // (windows - 1) for index in range(windows)]
+    ratios = [len(zlib.compress(data[start:start + window_size], ZLIB_LEVEL)) / window_size for start in starts]
+    estimates[ZLIB] = (round(fmean(ratios) * size), round(2 * stdev(ratios) / windows ** 0.5 * size))
+
+    return estimates, {}
+
+
+def run_length_size(data: bytes) -> int:
+    """
+    Count the bytes encode_runs would write for the data without encoding it.
+
+    The data is XORed with itself shifted by one byte as a big int, like string_compression.run_boundaries, so every
+    byte that repeats the one before is a zero and the number of runs is the number of bytes that are not. Every run
+    takes two bytes, plus a varint byte for each 7 bits its length has past the first 7, and the few runs long enough
+    for that are found with bytes.find.
+    """
+    size = len(data)
+    if size < 2:
+        return 2 * size
+
+    packed = int.from_bytes(data, "little")
+    changes = (packed ^ (packed >> 8)).to_bytes(size, "little")[:-1]
+    encoded_size = 2 * (size - changes.count(0))
+
+    start = changes.find(LONG_RUN_ZEROS)
+    while start >= 0:
+        end = RUN_PATTERNS[0].match(changes, start).end()
+        encoded_size += ((end - start + 1).bit_length() - 1) // 7
+        start = changes.find(LONG_RUN_ZEROS, end)
+
+    return encoded_size
+
+
+def append_run(output: bytearray, symbol: int, length: int) -> None:
+    """
+    Append a run to the output as its varint length and its byte.
+    """
+    while length > 0x7F:
+        output.append((length & 0x7F) | 0x80)
+        length >>= 7
+
+    output.append(length)
+    output.append(symbol)
+
+
+def read_varint(data: bytes, position: int) -> Tuple[int, int]:
+    """
+    Read a varint starting at the position.
+
+    :return: The value and the position after it, which is past the end of the data if the varint is incomplete.
+    """
+    value = 0
+    shift = 0
+    size = len(data)
+
+    while position < size:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+    return value, size + 1
+
+
+def expand_runs(runs: List[Tuple[int, int]], piece_size: int) -> Iterator[bytes]:
+    """
+    Expand runs into their bytes, joining short runs together and splitting long ones into pieces of at most
+    piece_size bytes.
+    """
+    pieces = []
+    pieces_size = 0
+
+    for symbol, length in runs:
+        if pieces_size + length > piece_size:
+            if pieces:
+                yield b"".join(pieces)
+                pieces = []
+                pieces_size = 0
+
+            block = bytes((symbol,)) * min(length, piece_size)
+            while length >= piece_size:
+                yield block
+                length -= piece_size
+
+        if length:
+            pieces.append(bytes((symbol,)) * length)
+            pieces_size += length
+
+    if pieces:
+        yield b"".join(pieces)
+
+
+# -- Main ---------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import io
+    import random
+
+    from function_timer import snapshot_decisions
+
+    print(f"aaabccccc -> {encode_runs(b'aaabccccc')}")
+    print(f"300 zero bytes -> {encode_runs(bytes(300))}")
+    print(f"Digits round trip should be a111b2: {decode_runs(encode_runs(b'a111b2'))}")
+
+    sensor_log = b"".join(bytes((reading,)) * (reading * 97 % 5000 + 1) for reading in range(256)) * 20
+    compressed = io.BytesIO()
+    compress_stream(io.BytesIO(sensor_log), compressed, chunk_size=4096)
+    decompressed = io.BytesIO()
+    decompress_stream(io.BytesIO(compressed.getvalue()), decompressed, chunk_size=100)
+    print(f"\nSensor log of {len(sensor_log)} bytes compressed to {len(compressed.getvalue())} bytes, "
+          f"round trip should be True: {decompressed.getvalue() == sensor_log}")
+
+    noisy_log = random.Random(0).randbytes(1 << 18)
+    text_log = b"time=00:00:01 sensor=7 reading=41.5 status=ok\n" * 8000
+    for name, log in (("Sensor log", sensor_log), ("Noisy log", noisy_log), ("Text log", text_log)):
+        packed = compress_adaptive(log)
+        print(f"{name} of {len(log)} bytes packed with {METHOD_NAMES[packed[0]]} to {len(packed)} bytes, "
+              f"round trip should be True: {decompress_adaptive(packed) == log}")
+    print(f"Decisions: {snapshot_decisions()}")
+
+    try:
+        decode_runs(b"\x03a\x85")
+    except ValueError as error:
+        print(f"\nTruncated encoding should raise ValueError: {error}")
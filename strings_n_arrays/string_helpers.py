@@ -2,6 +2,9 @@
 A place to store helper functions for working with strings.
 """
 
+from typing import Callable, Dict, Hashable, Iterable, List
+
+
 def printable_matrix(matrix: list[list]) -> str:
     """
     Return a string representation of the matrix for easy printing.
@@ -10,4 +13,66 @@ def printable_matrix(matrix: list[list]) -> str:
     for row in matrix:
         printable_matrix += f"{row}\n"
 
-    return printable_matrix
\ No newline at end of file
+    return printable_matrix
+
+
+class KeyedIndex:
+    """
+    An index of strings bucketed by a key function, so every string in a bucket has the same key as every other string
+    in it.
+
+    Checking whether any stored string shares the key of a query is one key and one dictionary lookup, instead of a
+    pairwise comparison against every stored string. Each bucket is a dictionary used as an ordered set, so strings
+    keep the order they were added in and adding one twice does nothing.
+
+    Time Complexity: O(1) per insert or query, plus the cost of the key
+    Space Complexity: O(n), where n is the total length of the stored strings
+    """
+
+    def __init__(self, key: Callable[[str], Hashable], strings: Iterable[str] = ()):
+        self.key = key
+        self.buckets: Dict[Hashable, Dict[str, None]] = {}
+        self.update(strings)
+
+    def add(self, string: str) -> None:
+        """
+        Add a string to the index. Adding a string already in the index does nothing.
+        """
+        key = self.key(string)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = {}
+        bucket[string] = None
+
+    def update(self, strings: Iterable[str]) -> None:
+        """
+        Add every string to the index.
+        """
+        for string in strings:
+            self.add(string)
+
+    def has_match(self, string: str) -> bool:
+        """
+        Check if any stored string has the same key as the given string.
+        """
+        return self.key(string) in self.buckets
+
+    def matches_of(self, string: str) -> List[str]:
+        """
+        Get every stored string with the same key as the given string, in the order they were added.
+        """
+        return list(self.buckets.get(self.key(string), ()))
+
+    def groups(self, min_size: int = 2) -> List[List[str]]:
+        """
+        Get every group of stored strings that share a key.
+
+        :param min_size: The smallest group to return, the default of 2 skips strings that share a key with no other.
+        """
+        return [list(bucket) for bucket in self.buckets.values() if len(bucket) >= min_size]
+
+    def __contains__(self, string: str) -> bool:
+        return string in self.buckets.get(self.key(string), ())
+
+    def __len__(self) -> int:
+        return sum(map(len, self.buckets.values()))
@@ -8,7 +8,24 @@ write code to check if s2 is a rotation of s1 using only one call to isSubstring
 Author: Fuzzy Carter
 """
 
-from function_timer import function_timer
+from itertools import islice, takewhile
+from math import gcd
+from typing import Optional
+
+from function_timer import function_timer, profile_helper
+
+# The length of the slices of string2 searched for in string1, how many places one can be found before it counts as
+# repeating, and how many slices are tried before the two-way search takes over. Each place is checked with one
+# comparison in C, so only inputs where every slice tried repeats, like a few copies of one block, pay for the search
+# in Python.
+ANCHOR_LENGTH = 1 << 12
+ANCHOR_MAX_SHIFTS = 2
+ANCHOR_TRIES = 4
+
+# Matched characters are compared in slices that start this long and double after every match, up to the maximum, so
+# the scan runs in C while no more than the maximum is ever copied at once.
+GALLOP_START = 8
+GALLOP_MAX = 1 << 12
 
 
 @function_timer
@@ -27,8 +44,54 @@ def is_rotation(string1: str, string2: str) -> bool:
     return is_substring(string1 + string1, string2)
 
 
+@function_timer
+def is_rotation_two_way(string1: str, string2: str) -> bool:
+    """
+    Checks if string2 is a rotation of string1 without building string1 + string1.
+
+    This searches for string2 in string1 doubled with Crochemore and Perrin's two-way algorithm. The doubled string is
+    only ever read through doubled_char and doubled_slice, which index string1 modulo its length. Two-way splits the
+    pattern at a critical factorization found from two maximal suffixes. It matches the right part forwards and the
+    left part backwards, and it remembers how much of the pattern's period is already matched. That makes the search
+    linear even on periodic inputs such as "aaa...ab", where a naive search is quadratic. It needs only a few integers
+    of state, unlike the failure table of KMP.
+
+    Strings no longer than ANCHOR_LENGTH are doubled as in is_rotation, since the copy is small. The search runs in
+    Python, so anchored_rotation first looks for slices of string2 in string1 with str.find, and a slice found in only
+    a few places decides the answer with a comparison in C at each of them. When a slice repeats because string2 is
+    periodic, as in "aaa...ab", or made of copies of a block, the next slice is taken where the repetition ends, so
+    such inputs are about as fast as is_rotation. Within the search, str.find skips the shifts that cannot match, and
+    characters are compared in slices of up to GALLOP_MAX characters, so long matches run in C while the copies stay
+    small. The 2n character concatenation is never made, which halves the peak memory of is_rotation for long strings,
+    counting both inputs.
+
+    The trade-off is time on inputs where every slice tried is found in many places without string2 repeating around
+    it, which takes strings built for it. The two-way search is still linear there, but it runs in Python, and run on
+    its own over a million random characters it is about 350x slower than is_rotation.
+
+    Time Complexity: O(n)
+    Space Complexity: O(1), apart from slices of at most GALLOP_MAX characters
+
+    :param string1: The string to rotate.
+    :param string2: The string to check is a rotation of string1.
+    :return: True if string2 is a rotation of string1.
+    """
+    if len(string1) != len(string2):
+        return False
+
+    if len(string1) <= ANCHOR_LENGTH:
+        return is_substring(string1 + string1, string2)
+
+    anchored = anchored_rotation(string1, string2)
+    if anchored is not None:
+        return anchored
+
+    return two_way_search_doubled(string1, string2)
+
+
 # -- Helper Functions ---------------------------------------------------------
 
+@profile_helper
 def is_substring(string1: str, string2: str) -> bool:
     """
     Checks if string2 is a substring of string1.
@@ -36,6 +99,277 @@ def is_substring(string1: str, string2: str) -> bool:
     return string2 in string1
 
 
+def anchored_rotation(text: str, pattern: str) -> Optional[bool]:
+    """
+    Check if the pattern is a rotation of the text from the places a slice of the pattern is found in the text, or
+    return None if every slice tried is found in too many places to check.
+
+    A slice found in at most ANCHOR_MAX_SHIFTS places fixes the only rotations that can match. If the text is copies of
+    a block whose length divides the distance between the first two places, rotations a block apart are the same, so
+    only the places in the first block are counted. Otherwise the pattern likely repeats from the slice on with the
+    distance between the first two places as its period, so the next slice tried is the one ending where the pattern
+    stops repeating, found by galloping in C, which is found in fewer places.
+    """
+    length = len(text)
+    block = 0
+    start = 0
+
+    for _ in range(ANCHOR_TRIES):
+        found = anchor_shifts(text, pattern[start:start + ANCHOR_LENGTH])
+        if block:
+            found = takewhile(block.__gt__, found)
+
+        shifts = list(islice(found, ANCHOR_MAX_SHIFTS + 1))
+        if len(shifts) <= ANCHOR_MAX_SHIFTS:
+            return any(is_rotation_at(text, pattern, (shift - start) % length) for shift in shifts)
+
+        period = shifts[1] - shifts[0]
+        if not block:
+            block = gcd(period, length)
+            if ranges_equal(text, block, text, 0, length - block):
+                continue
+            block = length
+
+        end = periodic_run_end(pattern, start + period, period)
+        if end >= length:
+            return None
+        start = end + 1 - ANCHOR_LENGTH
+
+    return None
+
+
+def anchor_shifts(text: str, anchor: str):
+    """
+    Find every rotation of the text that starts with the anchor, in order, looking across the end of the text through
+    a window no longer than twice the anchor.
+    """
+    length = len(text)
+    last = length - len(anchor)
+
+    shift = text.find(anchor, 0, length)
+    while shift != -1:
+        yield shift
+        shift = text.find(anchor, shift + 1, length)
+
+    window = text[last + 1:] + text[:len(anchor) - 1]
+    shift = window.find(anchor)
+    while shift != -1:
+        yield last + 1 + shift
+        shift = window.find(anchor, shift + 1)
+
+
+def is_rotation_at(text: str, pattern: str, shift: int) -> bool:
+    """
+    Check if the rotation of the text starting at the shift is the pattern.
+    """
+    tail = len(text) - shift
+    return (ranges_equal(text, shift, pattern, 0, tail) and
+            ranges_equal(text, 0, pattern, tail, shift))
+
+
+@profile_helper
+def two_way_search_doubled(text: str, pattern: str) -> bool:
+    """
+    Check if the pattern occurs in the text doubled with the two-way algorithm, where the pattern is as long as the
+    text.
+    """
+    length = len(pattern)
+    end = 2 * length - 1
+
+    suffix, period = maximal_suffix(pattern, reverse=False)
+    reverse_suffix, reverse_period = maximal_suffix(pattern, reverse=True)
+    if suffix < reverse_suffix:
+        suffix, period = reverse_suffix, reverse_period
+
+    if ranges_equal(pattern, 0, pattern, period, suffix + 1):
+        # The pattern is periodic, so after a full match the next period is already known to match.
+        shift = 0
+        memory = -1
+        while shift <= end - length:
+            if memory < 0:
+                shift = next_shift(text, pattern[suffix + 1], suffix + 1, shift, end - length)
+                if shift < 0:
+                    return False
+
+            index = forward_mismatch(pattern, text, max(suffix, memory) + 1, shift)
+            if index >= length:
+                if backward_mismatch(pattern, text, suffix, memory, shift) <= memory:
+                    return True
+                shift += period
+                memory = length - period - 1
+            else:
+                shift += index - suffix
+                memory = -1
+    else:
+        period = max(suffix + 1, length - suffix - 1) + 1
+        shift = 0
+        while shift <= end - length:
+            shift = next_shift(text, pattern[suffix + 1], suffix + 1, shift, end - length)
+            if shift < 0:
+                return False
+
+            index = forward_mismatch(pattern, text, suffix + 1, shift)
+            if index >= length:
+                if backward_mismatch(pattern, text, suffix, -1, shift) < 0:
+                    return True
+                shift += period
+            else:
+                shift += index - suffix
+
+    return False
+
+
+def maximal_suffix(pattern: str, reverse: bool) -> tuple:
+    """
+    Find the maximal suffix of the pattern, under the normal order of characters or the reverse order.
+
+    :return: The index before the start of the suffix and its period.
+    """
+    suffix = -1
+    candidate = 0
+    offset = period = 1
+
+    while candidate + offset < len(pattern):
+        ahead = pattern[candidate + offset]
+        behind = pattern[suffix + offset]
+
+        if ahead == behind:
+            # Everything from the suffix on repeats with the period, so the run of matches ends where that stops.
+            matched = offset - 1 + periodic_run_end(pattern, candidate + offset, period) - (candidate + offset)
+            candidate += period * (matched // period)
+            offset = matched % period + 1
+        elif (ahead < behind) != reverse:
+            candidate += offset
+            offset = 1
+            period = candidate - suffix
+        else:
+            suffix = candidate
+            candidate = suffix + 1
+            offset = period = 1
+
+    return suffix, period
+
+
+def periodic_run_end(pattern: str, index: int, period: int) -> int:
+    """
+    Find the first index from the given one where the pattern stops repeating with the period, or the length of the
+    pattern if it repeats to the end.
+    """
+    length = len(pattern)
+    step = GALLOP_START
+
+    while index < length:
+        stop = min(index + step, length)
+        if pattern[index:stop] != pattern[index - period:stop - period]:
+            while pattern[index] == pattern[index - period]:
+                index += 1
+            return index
+
+        index = stop
+        step = min(2 * step, GALLOP_MAX)
+
+    return index
+
+
+def next_shift(text: str, char: str, index: int, shift: int, last_shift: int) -> int:
+    """
+    Find the first shift from the given one, up to the last, that puts the character at the index of the pattern over
+    the same character in the text doubled, or -1 if there is none.
+    """
+    length = len(text)
+    start = index + shift
+    stop = index + last_shift + 1
+
+    if start < length:
+        found = text.find(char, start, min(stop, length))
+        if found != -1:
+            return found - index
+        start = length
+
+    if start < stop:
+        found = text.find(char, start - length, stop - length)
+        if found != -1:
+            return found + length - index
+
+    return -1
+
+
+def forward_mismatch(pattern: str, text: str, index: int, shift: int) -> int:
+    """
+    Find the first index from the given one where the pattern differs from the doubled text at the shift, or the
+    length of the pattern if it matches to the end.
+
+    Slices double in size while they match, so the time spent is proportional to the characters matched.
+    """
+    length = len(pattern)
+    step = GALLOP_START
+
+    while index < length:
+        stop = min(index + step, length)
+        if pattern[index:stop] != doubled_slice(text, index + shift, stop + shift):
+            while pattern[index] == doubled_char(text, index + shift):
+                index += 1
+            return index
+
+        index = stop
+        step = min(2 * step, GALLOP_MAX)
+
+    return index
+
+
+def backward_mismatch(pattern: str, text: str, index: int, stop: int, shift: int) -> int:
+    """
+    Find the first index from the given one down to just above the stop where the pattern differs from the doubled
+    text at the shift, or the stop if it matches all the way down.
+    """
+    step = GALLOP_START
+
+    while index > stop:
+        start = max(index + 1 - step, stop + 1)
+        if pattern[start:index + 1] != doubled_slice(text, start + shift, index + 1 + shift):
+            while pattern[index] == doubled_char(text, index + shift):
+                index -= 1
+            return index
+
+        index = start - 1
+        step = min(2 * step, GALLOP_MAX)
+
+    return stop
+
+
+def ranges_equal(first_string: str, first: int, second_string: str, second: int, length: int) -> bool:
+    """
+    Compare ranges of two strings in slices of at most GALLOP_MAX characters.
+    """
+    for offset in range(0, length, GALLOP_MAX):
+        size = min(GALLOP_MAX, length - offset)
+        if (first_string[first + offset:first + offset + size] !=
+                second_string[second + offset:second + offset + size]):
+            return False
+
+    return True
+
+
+def doubled_char(text: str, index: int) -> str:
+    """
+    Get a character of the text doubled.
+    """
+    return text[index - len(text) if index >= len(text) else index]
+
+
+def doubled_slice(text: str, start: int, stop: int) -> str:
+    """
+    Get a slice of the text doubled, joining the end and the start of the text if the slice wraps around.
+    """
+    length = len(text)
+    if stop <= length:
+        return text[start:stop]
+    if start >= length:
+        return text[start - length:stop - length]
+
+    return text[start:] + text[:stop - length]
+
+
 # -- Main ---------------------------------------------------------------------
 if __name__ == '__main__':
     test_string1 = "waterbottle"
@@ -45,3 +379,14 @@ if __name__ == '__main__':
 
     print(f"Is {test_string2} a rotation of {test_string1}? {is_rotation(test_string1, test_string2)}")
     print(f"Is {test_string_fail} a rotation of {test_string1}? {is_rotation(test_string1, test_string_fail)}")
+
+    print(f"\nTwo-way: Is {test_string2} a rotation of {test_string1}? "
+          f"{is_rotation_two_way(test_string1, test_string2)}")
+    print(f"Two-way: Is {test_string_fail} a rotation of {test_string1}? "
+          f"{is_rotation_two_way(test_string1, test_string_fail)}")
+
+    periodic = "a" * 500000 + "b"
+    print(f"Two-way: Is a periodic string a rotation of it with one a changed, should be False: "
+          f"{is_rotation_two_way(periodic, periodic[:-2] + 'bb')}")
+    print(f"Two-way: Is a periodic string a rotation of itself rotated by one, should be True: "
+          f"{is_rotation_two_way(periodic, periodic[1:] + periodic[0])}")
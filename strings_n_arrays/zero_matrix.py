@@ -11,7 +11,7 @@ Author: Fuzzy Carter
 """
 from copy import deepcopy
 
-from function_timer import function_timer
+from function_timer import function_timer, profile_helper
 from string_helpers import printable_matrix
 
 
@@ -119,6 +119,7 @@ def zero_matrix_source_matrix(matrix: list[list]) -> list[list]:
 # -- Helper Functions ---------------------------------------------------------
 
 
+@profile_helper
 def zero_out_row(matrix: list[list], row: int) -> None:
     """
     Zero out a row in a matrix.
@@ -127,6 +128,7 @@ def zero_out_row(matrix: list[list], row: int) -> None:
         matrix[row][column] = 0
 
 
+@profile_helper
 def zero_out_rows(matrix: list[list]) -> None:
     """
     Zero out +1 index rows in a matrix.
@@ -136,6 +138,7 @@ def zero_out_rows(matrix: list[list]) -> None:
             zero_out_row(matrix, row)
 
 
+@profile_helper
 def zero_out_column(matrix: list[list], column: int) -> None:
     """
     Zero out a column in a matrix.
@@ -144,6 +147,7 @@ def zero_out_column(matrix: list[list], column: int) -> None:
         matrix[row][column] = 0
 
 
+@profile_helper
 def zero_out_columns(matrix: list[list]) -> None:
     """
     Zero out +1 index columns in a matrix.
@@ -153,6 +157,7 @@ def zero_out_columns(matrix: list[list]) -> None:
             zero_out_column(matrix, column)
 
 
+@profile_helper
 def first_row_has_zero(matrix: list[list]) -> bool:
     """
     Check if the first row of a matrix has a zero.
@@ -163,6 +168,7 @@ def first_row_has_zero(matrix: list[list]) -> bool:
     return False
 
 
+@profile_helper
 def first_column_has_zero(matrix: list[list]) -> bool:
     """
     Check if the first column of a matrix has a zero.
@@ -173,6 +179,7 @@ def first_column_has_zero(matrix: list[list]) -> bool:
     return False
 
 
+@profile_helper
 def zero_out_first_column_row(first_row_zero: bool, first_column_zero: bool, matrix: list[list]) -> None:
     """
     Zero out the first row and column of a matrix if necessary.
@@ -184,6 +191,7 @@ def zero_out_first_column_row(first_row_zero: bool, first_column_zero: bool, mat
         zero_out_column(matrix, 0)
 
 
+@profile_helper
 def matrix_has_zeros(matrix: list[list]) -> None:
     """
     Check for zeros in the rest of the matrix and update the first row and column.